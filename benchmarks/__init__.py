@@ -0,0 +1 @@
+"""Performance benchmarks for the pipeline (run as ``python -m benchmarks.<name>``)"""
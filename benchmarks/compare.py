@@ -0,0 +1,123 @@
+"""Compare pipeline benchmark results against a committed baseline
+
+Matches ``benchmarks.pipeline_steps`` results to the baseline by step, row
+count and input format and fails (exit status 1) if any step slowed down
+beyond the tolerance. Timing noise is handled in four ways: medians of
+repeated runs are compared, the threshold widens with the run-to-run spread
+(median absolute deviation) of both sides, the fastest runs must also have
+slowed down (interference only ever adds time, so one slow run cannot fail
+the check), and steps faster than ``--min-seconds`` are reported but never
+fail.
+
+Without ``--current`` the suite is run here first, with the baseline's data
+settings and sizes. Baselines are machine-specific: regenerate them with
+``--update-baseline`` on the machine that runs the comparison.
+
+Usage::
+
+    python -m benchmarks.compare [--baseline benchmarks/baseline.json] [--current results.json] [--tolerance 0.15]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+from . import pipeline_steps
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def _spread(runs):
+    # Relative median absolute deviation of repeated timings
+    median = statistics.median(runs)
+    if len(runs) < 2 or not median:
+        return 0.0
+    return statistics.median(abs(r - median) for r in runs) / median
+
+def compare(baseline, current, tolerance=0.15, noise_factor=3.0, min_seconds=0.01):
+    """Rows describing each step's change; ``status`` is ok, regression,
+    improved, below-floor, new or missing"""
+    key = lambda r: (r["step"], r["rows"], r["format"])
+    base = {key(r): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        before = base.pop(key(result), None)
+        row = {"step": result["step"], "rows": result["rows"], "format": result["format"],
+               "baseline": before and before["median_seconds"], "current": result["median_seconds"],
+               "change": None, "threshold": None}
+        if before is None:
+            row["status"] = "new"
+        else:
+            row["change"] = row["current"] / row["baseline"] - 1 if row["baseline"] else 0.0
+            row["threshold"] = max(tolerance, noise_factor * (_spread(before["runs"]) + _spread(result["runs"])))
+            if max(row["baseline"], row["current"]) < min_seconds:
+                row["status"] = "below-floor"
+            elif row["change"] > row["threshold"] and result["min_seconds"] > before["min_seconds"] * (1 + tolerance):
+                row["status"] = "regression"
+            elif row["change"] < -row["threshold"]:
+                row["status"] = "improved"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+    rows += [{"step": s, "rows": n, "format": f, "baseline": r["median_seconds"], "current": None,
+              "change": None, "threshold": None, "status": "missing"} for (s, n, f), r in base.items()]
+    return rows
+
+def format_report(rows):
+    """Fixed-width table of ``compare`` rows, regressions first"""
+    order = {"regression": 0, "missing": 1, "improved": 2, "new": 3, "ok": 4, "below-floor": 5}
+    seconds = lambda v: "-" if v is None else f"{v:.3f}s"
+    percent = lambda v: "-" if v is None else f"{v:+.1%}"
+    lines = [f"{'step':<12} {'rows':>10} {'fmt':<5} {'baseline':>9} {'current':>9} {'change':>8} {'limit':>7}  status"]
+    for row in sorted(rows, key=lambda r: (order[r["status"]], r["step"], r["rows"])):
+        lines.append(
+            f"{row['step']:<12} {row['rows']:>10} {row['format']:<5} {seconds(row['baseline']):>9} "
+            f"{seconds(row['current']):>9} {percent(row['change']):>8} {percent(row['threshold']):>7}  "
+            f"{row['status'].upper() if row['status'] == 'regression' else row['status']}"
+        )
+    regressions = sum(row["status"] == "regression" for row in rows)
+    lines.append(f"{regressions} regression(s) in {len(rows)} comparisons")
+    return "\n".join(lines)
+
+def run_current(baseline, repeat):
+    """Run the suite with the baseline's data settings, sizes and formats"""
+    sizes = sorted({r["rows"] for r in baseline["results"]})
+    formats = sorted({r["format"] for r in baseline["results"]})
+    results = pipeline_steps.run_suite(sizes, formats, repeat, **baseline["data"])
+    return {"environment": pipeline_steps.environment(), "data": baseline["data"], "repeat": repeat,
+            "results": results}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results JSON")
+    parser.add_argument("--current", help="results JSON to check; runs the suite when omitted")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per size when running the suite")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown, e.g. 0.15 for 15%%")
+    parser.add_argument("--noise-factor", type=float, default=3.0,
+                        help="widen the limit to this many times the combined run-to-run spread")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="never fail steps faster than this")
+    parser.add_argument("--update-baseline", action="store_true", help="write the current results as the baseline")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        current = run_current(baseline, args.repeat)
+    if current.get("data") != baseline.get("data"):
+        print("warning: current results were generated with different data settings than the baseline")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    rows = compare(baseline, current, args.tolerance, args.noise_factor, args.min_seconds)
+    print(format_report(rows))
+    return 1 if any(row["status"] == "regression" for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Check that chunked deduplication time grows linearly with input size
+
+Times ``drop_duplicates_chunked`` on seeded frames of increasing size,
+both within the memory budget and spilling to disk, and fails (exit status
+1) when the time per row at the largest size exceeds ``--max-ratio`` times
+that at the smallest. Rescanning earlier chunks for every new one would
+make it grow with the row count instead.
+
+Usage::
+
+    python -m benchmarks.dedupe_scaling [--sizes 50000,400000] [--repeat 3] [--max-ratio 2.5]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_automation import drop_duplicates_chunked
+
+CHUNK_ROWS = 5000
+
+def time_dedupe(rows, memory_bytes, repeat):
+    """Median seconds to deduplicate a seeded ``rows``-row frame in chunks"""
+    rng = np.random.default_rng(rows)
+    df = pd.DataFrame({"Amount": rng.integers(0, rows, rows), "Qty": rng.integers(0, 50, rows)})
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in drop_duplicates_chunked((df.iloc[i:i + CHUNK_ROWS] for i in range(0, rows, CHUNK_ROWS)),
+                                         memory_bytes=memory_bytes):
+            pass
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=lambda v: [int(s) for s in v.split(",")], default=[50_000, 400_000],
+                        help="comma-separated row counts, smallest first")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size; the median is reported")
+    parser.add_argument("--spill-bytes", type=int, default=64 * 1024,
+                        help="memory budget of the spilling runs")
+    parser.add_argument("--max-ratio", type=float, default=2.5,
+                        help="fail when the largest size's time per row exceeds the smallest's by this factor")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for label, memory_bytes in (("in memory", None), ("spilling", args.spill_bytes)):
+        per_row = []
+        for rows in args.sizes:
+            seconds = time_dedupe(rows, memory_bytes, args.repeat)
+            per_row.append(seconds / rows)
+            print(f"{label:<10} {rows:>10,} rows {seconds:>8.3f}s {per_row[-1] * 1e6:>7.2f} us/row")
+        ratio = per_row[-1] / per_row[0]
+        if ratio > args.max_ratio:
+            print(f"FAIL: {label} time per row grew {ratio:.1f}x from {args.sizes[0]:,} to {args.sizes[-1]:,} rows "
+                  f"(limit {args.max_ratio}x)")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Benchmark the installed Excel reader engines and check the auto selection
+
+Writes representative mixed-type workbooks (10k/100k/1M cells by default),
+times ``pd.read_excel`` with every installed engine and reports whether
+``resolve_excel_engine("auto")`` picked the fastest one.
+
+Usage::
+
+    python -m benchmarks.excel_engines [--sizes 10000,100000] [--repeat 3] [--json results.json]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_automation import resolve_excel_engine, settings
+
+COLUMNS = 10
+
+def make_workbook(path, cells, seed=0):
+    """Write a workbook with ``cells`` cells of ints, floats, text and dates"""
+    rng = np.random.default_rng(seed)
+    rows = max(1, cells // COLUMNS)
+    data = {}
+    for i in range(COLUMNS):
+        kind = i % 4
+        if kind == 0:
+            data[f"int_{i}"] = rng.integers(0, 1_000_000, rows)
+        elif kind == 1:
+            data[f"float_{i}"] = rng.normal(1000, 250, rows).round(2)
+        elif kind == 2:
+            data[f"text_{i}"] = rng.choice([f"item-{n}" for n in range(500)], rows)
+        else:
+            data[f"date_{i}"] = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1500, rows), unit="D")
+    pd.DataFrame(data).to_excel(path, index=False)
+
+def time_engine(path, engine, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pd.read_excel(path, engine=engine)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated cell counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine; the best is kept")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    engines = [name for name, module in settings.EXCEL_ENGINE_PREFERENCE
+               if importlib.util.find_spec(module) is not None]
+    auto = resolve_excel_engine("auto")
+    print(f"installed engines: {', '.join(engines)}; auto selects: {auto}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for cells in (int(s) for s in args.sizes.split(",")):
+            path = os.path.join(tmp, f"bench_{cells}.xlsx")
+            make_workbook(path, cells)
+            timings = {engine: time_engine(path, engine, args.repeat) for engine in engines}
+            fastest = min(timings, key=timings.get)
+            results.append({"cells": cells, "seconds": timings, "fastest": fastest})
+            row = "  ".join(f"{engine}={seconds:.3f}s" for engine, seconds in timings.items())
+            print(f"{cells:>9} cells  {row}  fastest={fastest}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"auto": auto, "results": results}, f, indent=2)
+
+    wins = sum(r["fastest"] == auto for r in results)
+    print(f"auto selection was fastest on {wins}/{len(results)} workbook sizes")
+    return 0 if wins * 2 >= len(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
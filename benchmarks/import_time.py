@@ -0,0 +1,72 @@
+"""Guard the engine's cold-start import cost with ``python -X importtime``
+
+Imports ``excel_automation`` in fresh interpreters, reports the median
+total import time and the heaviest packages it pulls in, and fails (exit
+status 1) when the total exceeds the budget or a dependency that should be
+imported lazily (matplotlib, sqlite3, the Excel libraries, ...) is loaded
+at import time.
+
+Usage::
+
+    python -m benchmarks.import_time [--module excel_automation] [--repeat 5] [--budget-ms 1000]
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+LAZY_MODULES = ("matplotlib", "sqlite3", "streamlit", "openpyxl", "xlsxwriter", "python_calamine", "yaml")
+
+_LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def import_profile(module):
+    """Cumulative import microseconds of ``module`` and of everything it imports
+
+    Returns a dict keyed by module name for one cold import; modules the
+    interpreter had already loaded at startup are excluded.
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, check=True)
+    lines = [(len(m.group(3)), m.group(4), int(m.group(2)))
+             for m in map(_LINE_RE.match, proc.stderr.splitlines()) if m]
+    # Lines are printed children first, so the module's imports directly precede it
+    end = next(i for i, (depth, name, _) in enumerate(lines) if depth == 1 and name == module)
+    start = end
+    while start > 0 and lines[start - 1][0] > 1:
+        start -= 1
+    return {name: micros for _, name, micros in lines[start:end + 1]}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="excel_automation")
+    parser.add_argument("--repeat", type=int, default=5, help="cold imports; the median is reported")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="fail above this total import time")
+    parser.add_argument("--top", type=int, default=8, help="heaviest packages to list")
+    args = parser.parse_args(argv)
+
+    profiles = [import_profile(args.module) for _ in range(args.repeat)]
+    total_ms = statistics.median(p[args.module] for p in profiles) / 1000
+    eager = sorted({name.split(".")[0] for p in profiles for name in p} & set(LAZY_MODULES))
+
+    # Cost per top-level package: its most expensive (outermost) import
+    heaviest = {}
+    for name, micros in profiles[-1].items():
+        root = name.split(".")[0]
+        if root != args.module.split(".")[0]:
+            heaviest[root] = max(heaviest.get(root, 0), micros)
+    print(f"import {args.module}: {total_ms:.0f} ms (median of {args.repeat}, budget {args.budget_ms:.0f} ms)")
+    for name, micros in sorted(heaviest.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {name:<24} {micros / 1000:>7.1f} ms")
+
+    failed = False
+    if eager:
+        print(f"FAIL: imported eagerly, should be deferred to first use: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time {total_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Time each pipeline step on seeded synthetic inputs of increasing size
+
+For every size and input format, writes a synthetic file (see
+``benchmarks.synthetic``), then times ``load_data``, ``clean_data``,
+``validate_with_sql``, ``generate_report`` and the CSV and Excel exports,
+each fed the previous step's output. Results are printed and optionally
+written as JSON for ``benchmarks.compare``.
+
+Workbooks hold at most ``settings.EXCEL_MAX_ROWS`` rows, so larger sizes
+are only run from CSV. The 10M-row size needs several GB of memory.
+
+Usage::
+
+    python -m benchmarks.pipeline_steps [--sizes 10000,100000] [--formats csv,xlsx] [--repeat 3] [--json results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_automation import clean_data, export_data, generate_report, load_data, settings, validate_with_sql
+
+from .synthetic import make_frame, write_input
+
+STEPS = ("load", "clean", "validate", "report", "export_csv", "export_xlsx")
+
+def run_once(path, workdir):
+    """Run every step once on ``path``; returns seconds per step
+
+    The chart PNG cache points at an empty directory for each run, so
+    ``report`` always renders rather than reusing an earlier run's chart.
+    Every step raises on failure instead of logging it and returning early.
+    """
+    timings = {}
+
+    def timed(step, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[step] = time.perf_counter() - start
+        return result
+
+    chart_cache = settings.CHART_CACHE_DIR
+    with tempfile.TemporaryDirectory(prefix="charts-") as charts:
+        settings.CHART_CACHE_DIR = charts
+        try:
+            # A step that only logged its failure would be timed as a fast success
+            df = timed("load", load_data, path, use_cache=False, errors="raise")
+            df = timed("clean", clean_data, df, errors="raise")
+            df = timed("validate", validate_with_sql, df, errors="raise")
+            timed("report", generate_report, df, workdir, errors="raise")
+            timed("export_csv", export_data, df, os.path.join(workdir, "out.csv"), errors="raise")
+            timed("export_xlsx", export_data, df, os.path.join(workdir, "out.xlsx"), errors="raise")
+        finally:
+            settings.CHART_CACHE_DIR = chart_cache
+    return timings
+
+def run_suite(sizes, formats=("csv", "xlsx"), repeat=3, **frame_options):
+    """Benchmark every (size, format); returns one result dict per step"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        # Untimed warm-up so first-use costs (lazy imports, font caches) are not measured
+        run_once(write_input(make_frame(1000, **frame_options), os.path.join(tmp, "warmup.csv")), tmp)
+    for rows in sizes:
+        df = make_frame(rows, **frame_options)
+        for fmt in formats:
+            if fmt == "xlsx" and rows > settings.EXCEL_MAX_ROWS:
+                print(f"{rows:>10} rows  {fmt:<4}  skipped: more rows than a worksheet holds")
+                continue
+            with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+                path = write_input(df, os.path.join(tmp, f"input.{fmt}"))
+                runs = [run_once(path, tmp) for _ in range(repeat)]
+            for step in STEPS:
+                seconds = [run[step] for run in runs]
+                median = statistics.median(seconds)
+                results.append({
+                    "step": step, "rows": rows, "format": fmt, "runs": seconds,
+                    "median_seconds": median, "min_seconds": min(seconds),
+                    "rows_per_second": rows / median if median else None,
+                })
+            row = "  ".join(f"{step}={statistics.median(run[step] for run in runs):.3f}s" for step in STEPS)
+            print(f"{rows:>10} rows  {fmt:<4}  {row}")
+    return results
+
+def environment():
+    return {
+        "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+        "platform": platform.platform(), "cpus": os.cpu_count(),
+    }
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000,10000000", help="comma-separated row counts")
+    parser.add_argument("--formats", default="csv,xlsx", help="comma-separated input formats")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size; the median is reported")
+    parser.add_argument("--columns", type=int, default=6)
+    parser.add_argument("--null-rate", type=float, default=0.05)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--negative-rate", type=float, default=0.02, help="share of negative Amount values")
+    parser.add_argument("--cardinality", type=int, default=1000, help="distinct values per text column")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    frame_options = {
+        "columns": args.columns, "null_rate": args.null_rate, "duplicate_rate": args.duplicate_rate,
+        "negative_rate": args.negative_rate, "cardinality": args.cardinality, "seed": args.seed,
+    }
+    results = run_suite([int(s) for s in args.sizes.split(",")], args.formats.split(","), args.repeat,
+                        **frame_options)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment(), "data": frame_options, "repeat": args.repeat,
+                       "results": results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
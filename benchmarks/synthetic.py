@@ -0,0 +1,57 @@
+"""Seeded synthetic inputs shaped like the uploads the pipeline cleans
+
+``make_frame`` builds a DataFrame with the ``Name``/``Amount``/``Category``
+columns the default rule and report use, plus extra numeric and text
+columns, with controllable nulls, duplicate rows, negative amounts and text
+cardinality. ``write_input`` saves it as CSV or Excel.
+"""
+import numpy as np
+import pandas as pd
+
+from excel_automation import write_excel
+
+def make_frame(rows, columns=6, null_rate=0.05, duplicate_rate=0.05, negative_rate=0.02,
+               cardinality=1000, seed=0):
+    """Synthetic frame of ``rows`` rows and ``columns`` (at least 3) columns
+
+    ``null_rate`` of the cells in every column are missing,
+    ``duplicate_rate`` of the rows repeat an earlier row, ``negative_rate``
+    of the amounts are negative and text columns draw from ``cardinality``
+    distinct values.
+    """
+    if columns < 3:
+        raise ValueError("columns must be at least 3 (Name, Amount, Category)")
+    rng = np.random.default_rng(seed)
+    words = np.array([f"value-{i}" for i in range(cardinality)], dtype=object)
+    amount = rng.gamma(2.0, 500.0, rows).round(2)
+    amount[rng.random(rows) < negative_rate] *= -1
+    data = {
+        "Name": words[rng.integers(0, cardinality, rows)],
+        "Amount": amount,
+        "Category": words[rng.integers(0, min(cardinality, 20), rows)],
+    }
+    for i in range(3, columns):
+        if i % 2:
+            data[f"Metric_{i}"] = rng.normal(100.0, 15.0, rows).round(3)
+        else:
+            data[f"Label_{i}"] = words[rng.integers(0, cardinality, rows)]
+    df = pd.DataFrame(data)
+
+    for col in df.columns:
+        mask = rng.random(rows) < null_rate
+        if mask.any():
+            df[col] = df[col].mask(mask)
+    # Overwrite a share of the rows with copies of rows that precede them
+    dupes = np.flatnonzero(rng.random(rows) < duplicate_rate)
+    dupes = dupes[dupes > 0]
+    if len(dupes):
+        df.iloc[dupes] = df.iloc[rng.integers(0, dupes)].to_numpy()
+    return df
+
+def write_input(df, path):
+    """Save ``df`` as CSV or (streamed, via ``write_excel``) as a workbook"""
+    if path.endswith(".csv"):
+        df.to_csv(path, index=False)
+    else:
+        write_excel(df, path)
+    return path
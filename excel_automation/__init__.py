@@ -0,0 +1,44 @@
+"""Excel/CSV workflow automation engine
+
+Pure pipeline functions (load, clean, validate, report, export) with no
+Streamlit dependency. The UI lives in ``excel_automation_app.py`` and the
+batch CLI in ``excel_automation.cli`` (``python -m excel_automation``).
+"""
+from . import settings
+from .batch import discover_inputs, run_batch
+from .cleaning import MeanAccumulator, SeenHashes, clean_data, drop_duplicates_chunked, row_hashes
+from .dtypes import numeric_columns, optimize_dtypes, text_columns
+from .export import export_data, write_excel
+from .jobs import Job, JobRunner
+from .loading import (
+    cache_get, cache_put, evict_cache, file_digest, iter_excel_chunks, load_data, load_sheets,
+    resolve_excel_engine,
+)
+from .metrics import instrument, metrics_handler, recent_metrics
+from .pipeline import Pipeline, StepCache, run_file
+from .report import generate_report
+from .streaming import ChunkSpool, is_chunked
+from .summary import (
+    CategoricalSummary, FrequentItems, Histogram, HyperLogLog, KLLSketch, NumericSummary,
+    SummaryAccumulator, summarize,
+)
+from .validation import (
+    Rule, RuleSyntaxError, compile_rule, load_rules, rule_columns, rule_mask, validate_rules,
+    validate_with_sql,
+)
+from .workspace import atomic_write, cleanup_jobs, create_job_dir, job_path, touch_job_dir
+
+__all__ = [
+    "settings",
+    "load_data", "load_sheets", "iter_excel_chunks", "resolve_excel_engine", "file_digest", "cache_get", "cache_put", "evict_cache",
+    "clean_data", "drop_duplicates_chunked", "row_hashes", "SeenHashes", "MeanAccumulator",
+    "validate_with_sql", "validate_rules", "load_rules", "Rule", "RuleSyntaxError",
+    "compile_rule", "rule_mask", "rule_columns",
+    "summarize", "SummaryAccumulator", "NumericSummary", "CategoricalSummary",
+    "KLLSketch", "HyperLogLog", "FrequentItems", "Histogram",
+    "generate_report", "write_excel", "export_data",
+    "optimize_dtypes", "numeric_columns", "text_columns",
+    "atomic_write", "create_job_dir", "touch_job_dir", "job_path", "cleanup_jobs",
+    "instrument", "recent_metrics", "metrics_handler",
+    "is_chunked", "ChunkSpool", "Pipeline", "StepCache", "Job", "JobRunner", "run_file", "run_batch", "discover_inputs",
+]
@@ -0,0 +1,99 @@
+"""Processing whole directories of workbooks across a process pool"""
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import settings
+from .metrics import metrics_handler
+from .pipeline import STEPS, run_file
+
+logger = logging.getLogger(__name__)
+
+INPUT_EXTENSIONS = (".xlsx", ".csv")
+
+def discover_inputs(source):
+    """Input files in a directory, or matching a glob pattern, sorted by name"""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    # Skip Excel's "~$" lock files left next to open workbooks
+    return sorted(p for p in paths
+                  if p.endswith(INPUT_EXTENSIONS) and not os.path.basename(p).startswith("~$"))
+
+def _output_root(source, paths):
+    # Outputs mirror the inputs' paths below this directory
+    if os.path.isdir(source):
+        return source
+    return os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+
+def _init_worker(trace_memory):
+    settings.TRACE_MEMORY = trace_memory  # spawned workers do not inherit the parent's settings
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            filename=settings.LOG_FILE,
+            level=logging.INFO,
+            format=settings.LOG_FORMAT,
+            datefmt=settings.LOG_DATE_FORMAT,
+        )
+        logging.getLogger("excel_automation.metrics").addHandler(metrics_handler())
+
+def _process_file(path, steps, output_dir, rules, chunksize):
+    start = time.perf_counter()
+    try:
+        result = run_file(path, steps, rules=rules, chunksize=chunksize,
+                          output_dir=output_dir, use_cache=False)
+        status = {"status": "ok", "rows": result["rows"], "output": result["output"], "error": None}
+    except Exception as e:
+        logger.error(f"Batch processing failed for {path}: {e}")
+        status = {"status": "failed", "rows": 0, "output": None, "error": str(e)}
+    return {"input": path, "seconds": time.perf_counter() - start, **status}
+
+def run_batch(source, steps=STEPS, output_dir=None, workers=None, rules=None, chunksize=None, on_result=None):
+    """Run the pipeline on every input under ``source`` in parallel
+
+    ``source`` is a directory or glob pattern. Each file runs in its own
+    worker process (``workers`` defaults to the CPU count) and writes its
+    outputs to ``output_dir/<path below source>/``, named after the whole
+    file name so ``region.csv`` and ``region.xlsx`` do not share a
+    directory. A file whose load, clean, validate, report or export step
+    fails is reported as failed. ``on_result`` is called with
+    each file's status dict as it completes. Returns a dict with the
+    per-file results and aggregate throughput.
+    """
+    paths = discover_inputs(source)
+    root = _output_root(source, paths) if paths else source
+    output_dir = output_dir or os.path.join(settings.OUTPUT_DIR, "batch")
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"Batch run: {len(paths)} files from {source} with {workers} workers")
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(settings.TRACE_MEMORY,)) as pool:
+        futures = [
+            pool.submit(_process_file, path, list(steps),
+                        os.path.join(output_dir, os.path.relpath(os.path.abspath(path), os.path.abspath(root))),
+                        rules, chunksize)
+            for path in paths
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result:
+                on_result(result)
+    elapsed = time.perf_counter() - start
+    rows = sum(r["rows"] for r in results)
+    summary = {
+        "files": len(results),
+        "failed": sum(r["status"] != "ok" for r in results),
+        "rows": rows,
+        "seconds": elapsed,
+        "files_per_second": len(results) / elapsed if elapsed else 0.0,
+        "rows_per_second": rows / elapsed if elapsed else 0.0,
+        "results": sorted(results, key=lambda r: r["input"]),
+    }
+    logger.info(f"Batch run finished: {summary['files']} files, {summary['failed']} failed, "
+                f"{rows} rows in {elapsed:.2f}s")
+    return summary
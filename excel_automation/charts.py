@@ -0,0 +1,82 @@
+"""Rendering report charts off-screen, with a PNG cache
+
+Charts are drawn with matplotlib's object-oriented ``Figure`` API on an Agg
+canvas: no pyplot global state and no GUI backend, so rendering is safe
+from worker threads. Charts are drawn from pre-binned data (see
+``summary.Histogram``), so rendering cost does not depend on row count.
+Each PNG is cached under a hash of the plotted data and the chart spec, so
+regenerating a report for unchanged data skips matplotlib entirely.
+"""
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+from . import settings
+from .workspace import atomic_write
+
+logger = logging.getLogger(__name__)
+
+AMOUNT_HISTOGRAM = {
+    "kind": "histogram", "column": "Amount", "bins": 20, "title": "Distribution of Amounts",
+    "xlabel": "Amount", "ylabel": "Frequency", "figsize": (6, 4), "dpi": 100,
+}
+
+def chart_key(data_hash, spec):
+    """Cache key of a chart: its data hash and its spec"""
+    return hashlib.sha256(f"{data_hash}:{json.dumps(spec, sort_keys=True)}".encode()).hexdigest()
+
+def _cache_path(key):
+    return os.path.join(settings.CHART_CACHE_DIR, f"{key}.png")
+
+def _evict():
+    entries = []
+    for entry in os.scandir(settings.CHART_CACHE_DIR):
+        if entry.name.endswith(".png") and not entry.name.startswith("."):
+            with contextlib.suppress(FileNotFoundError):
+                entries.append((entry.stat().st_mtime, entry.path))
+    for _, path in sorted(entries)[:max(0, len(entries) - settings.CHART_CACHE_MAX_ENTRIES)]:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+def _render_histogram(hist, spec, path):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # deferred: only reports need matplotlib
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=spec["figsize"], dpi=spec["dpi"])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    # The precomputed bin heights are drawn as they are; matplotlib bins nothing
+    ax.stairs(hist.counts, hist.edges, fill=True)
+    ax.grid(True)
+    ax.set_title(spec["title"])
+    ax.set_xlabel(spec["xlabel"])
+    ax.set_ylabel(spec["ylabel"])
+    fig.tight_layout()
+    fig.savefig(path, format="png")
+
+def save_histogram(hist, path, spec=AMOUNT_HISTOGRAM):
+    """Write the PNG of a ``Histogram`` to ``path``, rendering only on a cache miss
+
+    Returns True when the PNG came from the cache.
+    """
+    cached = _cache_path(chart_key(hist.digest(), spec))
+    with atomic_write(path) as tmp_path:
+        try:
+            shutil.copyfile(cached, tmp_path)
+            os.utime(cached)  # mark as recently used
+            logger.info(f"Chart {os.path.basename(path)} served from cache")
+            return True
+        except FileNotFoundError:
+            pass
+        _render_histogram(hist, spec, tmp_path)
+    os.makedirs(settings.CHART_CACHE_DIR, exist_ok=True)
+    try:
+        with atomic_write(cached) as tmp_cached:
+            shutil.copyfile(path, tmp_cached)
+        _evict()
+    except OSError as e:
+        logger.warning(f"Could not cache chart {os.path.basename(path)}: {e}")
+    return False
@@ -0,0 +1,253 @@
+"""Duplicate removal and missing-value imputation, in memory or chunked"""
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from . import settings
+from .dtypes import numeric_columns, text_columns
+from .metrics import instrument
+from .streaming import ChunkSpool, is_chunked
+
+logger = logging.getLogger(__name__)
+
+def row_hashes(df):
+    """64-bit hash of every row's values, comparable across chunks
+
+    Numeric columns are hashed as float64 so that a column parsed as int in
+    one chunk and as float (because of missing values) in another still
+    produces matching hashes. Missing values hash alike whatever the
+    column's dtype, so a text column that is entirely missing in one chunk
+    (and so parsed as float) matches the same rows elsewhere.
+    """
+    numeric_cols = set(numeric_columns(df))
+    columns = np.empty((len(df), df.shape[1]), dtype=np.uint64)
+    for i, col in enumerate(df.columns):
+        series = df.iloc[:, i]
+        if col in numeric_cols:
+            series = series.astype("float64")
+        columns[:, i] = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        columns[series.isna().to_numpy(), i] = np.iinfo(np.uint64).max
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+class SeenHashes:
+    """In-memory set of row hashes: one sorted array per hash partition
+
+    Membership is a binary search and new hashes are merged into the sorted
+    arrays in place of re-scanning what was seen before, so each chunk costs
+    O(chunk log seen) to check plus one copy of the partitions it touches.
+    """
+
+    def __init__(self, partitions=None):
+        self.partitions = partitions or settings.DEDUPE_PARTITIONS
+        self.sets = [np.empty(0, dtype=np.uint64) for _ in range(self.partitions)]
+
+    @property
+    def nbytes(self):
+        return sum(s.nbytes for s in self.sets)
+
+    def add_new(self, hashes):
+        """Record ``hashes``; return a mask of those not seen before"""
+        new = ~pd.Series(hashes).duplicated().to_numpy()
+        parts = hashes % np.uint64(self.partitions)
+        for part in np.unique(parts[new]):
+            idx = np.flatnonzero(new & (parts == part))
+            seen, candidates = self.sets[part], hashes[idx]
+            pos = np.searchsorted(seen, candidates)
+            found = (pos < len(seen)) & (seen[np.minimum(pos, len(seen) - 1)] == candidates) if len(seen) \
+                else np.zeros(len(idx), dtype=bool)
+            new[idx[found]] = False
+            fresh = np.sort(candidates[~found])
+            self.sets[part] = np.insert(seen, np.searchsorted(seen, fresh), fresh)
+        return new
+
+class HashSpill:
+    """On-disk (hash, row position) pairs, deduplicated in one pass at the end
+
+    Pairs are appended to one file per hash partition. ``duplicates`` then
+    reads each partition once (splitting any partition larger than
+    ``memory_bytes`` further by other hash bits) and marks every row whose
+    hash already occurred at an earlier position.
+    """
+
+    PAIR = np.dtype([("hash", np.uint64), ("pos", np.int64)])
+
+    def __init__(self, directory, memory_bytes, partitions=None):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.partitions = partitions or settings.DEDUPE_PARTITIONS
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"pairs-{name}.bin")
+
+    def _write(self, pairs, names, parts):
+        for part in np.unique(parts):
+            with open(self._path(names[part]), "ab") as f:
+                pairs[parts == part].tofile(f)
+
+    def append(self, hashes, positions):
+        """Record rows; position -1 marks hashes seen before the spill"""
+        pairs = np.empty(len(hashes), dtype=self.PAIR)
+        pairs["hash"], pairs["pos"] = hashes, positions
+        names = [str(p) for p in range(self.partitions)]
+        self._write(pairs, names, hashes % np.uint64(self.partitions))
+
+    def _mark(self, name, drop, depth=0):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return
+        if os.path.getsize(path) > self.memory_bytes and depth < 3:
+            # Too big to sort in memory: split by the next 16 bits of the hash
+            fanout = int(min(256, os.path.getsize(path) // self.memory_bytes + 2))
+            names = [f"{name}-{i}" for i in range(fanout)]
+            block = max(1, self.memory_bytes // self.PAIR.itemsize)
+            with open(path, "rb") as f:
+                while (pairs := np.fromfile(f, dtype=self.PAIR, count=block)).size:
+                    self._write(pairs, names, (pairs["hash"] >> np.uint64(16 * (depth + 1))) % np.uint64(fanout))
+            os.remove(path)
+            for sub in names:
+                self._mark(sub, drop, depth + 1)
+            return
+        pairs = np.fromfile(path, dtype=self.PAIR)
+        os.remove(path)
+        pairs.sort(order=["hash", "pos"])
+        repeat = np.zeros(len(pairs), dtype=bool)
+        repeat[1:] = pairs["hash"][1:] == pairs["hash"][:-1]
+        dup = pairs["pos"][repeat]
+        dup = dup[dup >= 0]
+        np.bitwise_or.at(drop, dup >> 3, (np.uint8(128) >> (dup & 7).astype(np.uint8)))
+
+    def duplicates(self, rows):
+        """Packed bitmap (1 bit per row, big-endian) of duplicate positions"""
+        drop = np.zeros((rows + 7) // 8, dtype=np.uint8)
+        for part in range(self.partitions):
+            self._mark(str(part), drop)
+        return drop
+
+def drop_duplicates_chunked(chunks, memory_bytes=None):
+    """Drop duplicate rows across a chunk stream; first occurrence wins
+
+    Rows are compared by 64-bit hash. While the set of seen hashes fits in
+    ``memory_bytes`` (default ``settings.DEDUPE_MEMORY_BYTES``) chunks are
+    checked against it and yielded as they arrive. Past the budget, the
+    seen set and the rest of the stream's (hash, position) pairs are
+    spilled to disk with the rows, deduplicated partition by partition in
+    one pass, and the remaining rows are replayed at the end.
+    """
+    budget = settings.DEDUPE_MEMORY_BYTES if memory_bytes is None else memory_bytes
+    removed = 0
+    with tempfile.TemporaryDirectory(prefix="dedupe-") as tmp:
+        seen, spill = SeenHashes(), None
+        chunks = iter(chunks)
+        for chunk in chunks:
+            keep = seen.add_new(row_hashes(chunk))
+            removed += len(chunk) - int(keep.sum())
+            yield chunk[keep]
+            if seen.nbytes > budget:
+                logger.info("Seen row hashes over the dedupe memory budget, spilling to disk")
+                spill = HashSpill(tmp, budget, seen.partitions)
+                for hashes in seen.sets:
+                    spill.append(hashes, np.full(len(hashes), -1, dtype=np.int64))
+                seen = None
+                break
+
+        if spill is not None:
+            spool, rows = ChunkSpool(tmp), 0
+            for chunk in chunks:
+                spill.append(row_hashes(chunk), np.arange(rows, rows + len(chunk), dtype=np.int64))
+                spool.append(chunk)
+                rows += len(chunk)
+            drop, start = spill.duplicates(rows), 0
+            for chunk in spool:
+                bits = np.unpackbits(drop[start >> 3:(start + len(chunk) + 7 >> 3) + 1])
+                keep = bits[start & 7:(start & 7) + len(chunk)] == 0
+                removed += len(chunk) - int(keep.sum())
+                start += len(chunk)
+                yield chunk[keep]
+    logger.info(f"Chunked dedupe complete: {removed} duplicates removed")
+
+class MeanAccumulator:
+    """Running per-column count and sum, fed one chunk at a time"""
+
+    def __init__(self):
+        self.count = pd.Series(dtype="int64")
+        self.total = pd.Series(dtype="float64")
+
+    def update(self, df):
+        self.count = self.count.add(df.count(), fill_value=0)
+        self.total = self.total.add(df.sum().astype("float64"), fill_value=0)
+
+    def means(self):
+        return self.total / self.count.where(self.count > 0)
+
+def _fill_missing(df, means=None, text_cols=None):
+    # Text columns that are entirely missing in a chunk are read as float,
+    # so a chunked clean passes the roles seen across the whole stream
+    text_cols = text_columns(df) if text_cols is None else pd.Index(text_cols)
+    for col in text_cols.difference(text_columns(df), sort=False):
+        df[col] = df[col].astype("str")
+
+    # Fill missing numeric values with mean
+    numeric_cols = numeric_columns(df).difference(text_cols, sort=False)
+    if means is None:
+        means = df[numeric_cols].mean()
+    df[numeric_cols] = df[numeric_cols].fillna(means)
+
+    # Fill missing text values with 'Unknown'
+    for col in text_cols:
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and "Unknown" not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories("Unknown")
+    df[text_cols] = df[text_cols].fillna("Unknown")
+    return df
+
+def _clean_chunks(chunks):
+    try:
+        logger.info("Cleaning data in chunks...")
+        with tempfile.TemporaryDirectory(prefix="clean-") as tmp:
+            # First pass: dedupe, record which columns hold text anywhere in
+            # the stream, accumulate column means and spool to disk
+            spool = ChunkSpool(tmp)
+            stats = MeanAccumulator()
+            text = set()
+            for chunk in drop_duplicates_chunked(chunks):
+                text.update(text_columns(chunk))
+                stats.update(chunk[numeric_columns(chunk)])
+                spool.append(chunk)
+
+            # Second pass: replay the spooled chunks and impute
+            means = stats.means()
+            for chunk in spool:
+                yield _fill_missing(chunk, means, [col for col in chunk.columns if col in text])
+    except Exception as e:
+        logger.error(f"Error cleaning data: {e}")
+        raise
+
+@instrument("clean")
+def clean_data(df, errors="log"):
+    """Clean and validate data
+
+    A chunk iterator is cleaned lazily, one chunk at a time, with
+    duplicates removed across the whole stream; its failures are raised
+    while iterating. A DataFrame that cannot be cleaned is logged and
+    returned unchanged, or re-raised with ``errors="raise"``.
+    """
+    if is_chunked(df):
+        return _clean_chunks(df)
+    try:
+        logger.info("Cleaning data...")
+        before_rows = len(df)
+
+        # Drop duplicates
+        df = df.drop_duplicates()
+        df = _fill_missing(df)
+
+        after_rows = len(df)
+        logger.info(f"Data cleaned: {before_rows - after_rows} duplicates removed")
+        return df
+    except Exception as e:
+        logger.error(f"Error cleaning data: {e}")
+        if errors == "raise":
+            raise
+        return df
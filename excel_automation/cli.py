@@ -0,0 +1,113 @@
+"""Headless command-line entry point for cron and batch use
+
+Usage::
+
+    python -m excel_automation run --input data.xlsx --steps clean,validate,report
+    python -m excel_automation batch --input incoming/ --workers 8
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from . import settings
+from .batch import run_batch
+from .metrics import metrics_handler
+from .pipeline import STEPS, run_file
+
+def _steps(value):
+    steps = [s.strip() for s in value.split(",") if s.strip()]
+    unknown = [s for s in steps if s not in STEPS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown step(s) {', '.join(unknown)}; choose from {', '.join(STEPS)}")
+    return steps
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="excel-automation", description="Excel/CSV workflow automation")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run pipeline steps on one input file")
+    run.add_argument("--input", required=True, help="input .xlsx or .csv file")
+    run.add_argument("--steps", type=_steps, default=list(STEPS),
+                     help=f"comma-separated steps to run (default: {','.join(STEPS)})")
+    run.add_argument("--output", help=f"output .xlsx or .csv (default: {settings.OUTPUT_CLEANED_FILE})")
+    run.add_argument("--rules", help="JSON/YAML rule set for the validate step; "
+                                     "violations are written next to the output")
+    run.add_argument("--chunksize", type=int, help="stream the input in chunks of this many rows")
+    run.add_argument("--engine", default="auto",
+                     help="Excel reader: auto (fastest installed), calamine or openpyxl")
+    run.add_argument("--columns", type=lambda v: [c.strip() for c in v.split(",")],
+                     help="comma-separated columns to load; others are never parsed")
+    run.add_argument("--filter", dest="filters", action="append",
+                     help="row predicate applied while loading, e.g. \"Region = 'North'\" (repeatable)")
+    run.add_argument("--optimize-dtypes", action="store_true",
+                     help="load with compact dtypes (downcast numerics, arrow strings, categories)")
+    run.add_argument("--all-sheets", action="store_true",
+                     help="load every sheet of a workbook (in parallel) into one frame with a 'sheet' column")
+    run.add_argument("--trace-memory", action="store_true",
+                     help="add each step's tracemalloc peak to its metrics record (slows steps)")
+
+    batch = commands.add_parser("batch", help="run the pipeline on every workbook in a directory or glob")
+    batch.add_argument("--input", required=True, help="directory or glob pattern of .xlsx/.csv files")
+    batch.add_argument("--steps", type=_steps, default=list(STEPS),
+                       help=f"comma-separated steps to run (default: {','.join(STEPS)})")
+    batch.add_argument("--output-dir", help="directory for per-file outputs (default: output/batch)")
+    batch.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    batch.add_argument("--rules", help="JSON/YAML rule set for the validate step; "
+                                       "violations are written to each file's output directory")
+    batch.add_argument("--chunksize", type=int, help="stream each input in chunks of this many rows")
+    batch.add_argument("--trace-memory", action="store_true",
+                       help="add each step's tracemalloc peak to its metrics record (slows steps)")
+    return parser
+
+def _configure_logging():
+    os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+    logging.basicConfig(
+        filename=settings.LOG_FILE,
+        level=logging.INFO,
+        format=settings.LOG_FORMAT,
+        datefmt=settings.LOG_DATE_FORMAT,
+    )
+    # Errors also go to stderr so cron mails them
+    root = logging.getLogger()
+    if any(h.get_name() == "excel-automation-console" for h in root.handlers):
+        return
+    console = logging.StreamHandler(sys.stderr)
+    console.set_name("excel-automation-console")
+    console.setLevel(logging.ERROR)
+    console.setFormatter(logging.Formatter(settings.LOG_FORMAT, settings.LOG_DATE_FORMAT))
+    root.addHandler(console)
+    # Per-step metrics also go to their own JSON-lines file
+    logging.getLogger("excel_automation.metrics").addHandler(metrics_handler())
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    _configure_logging()
+    if args.trace_memory:
+        settings.TRACE_MEMORY = True
+    if args.command == "run":
+        start = time.perf_counter()
+        try:
+            result = run_file(args.input, args.steps, args.output, args.rules, args.chunksize,
+                              all_sheets=args.all_sheets, engine=args.engine,
+                              optimize=args.optimize_dtypes, columns=args.columns, filters=args.filters)
+        except Exception as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        elapsed = time.perf_counter() - start
+        print(f"{result['input']}: {result['rows']} rows -> {result['output']} ({elapsed:.2f}s)")
+        for path in result["violations"]:
+            print(f"violations -> {path}")
+    elif args.command == "batch":
+        def report(result):
+            detail = f"{result['rows']} rows" if result["status"] == "ok" else result["error"]
+            print(f"[{result['status']}] {result['input']}: {detail} ({result['seconds']:.2f}s)", flush=True)
+
+        summary = run_batch(args.input, args.steps, args.output_dir, args.workers,
+                            args.rules, args.chunksize, on_result=report)
+        print(f"{summary['files']} files ({summary['failed']} failed), {summary['rows']} rows "
+              f"in {summary['seconds']:.2f}s: {summary['files_per_second']:.2f} files/s, "
+              f"{summary['rows_per_second']:.0f} rows/s")
+        return 1 if summary["failed"] else 0
+    return 0
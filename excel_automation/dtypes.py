@@ -0,0 +1,67 @@
+"""Compact dtypes for loaded frames and dtype-agnostic column selection"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import settings
+
+try:
+    import pyarrow  # noqa: F401  (needed for the pyarrow-backed string dtype)
+    _STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    _STRING_DTYPE = None
+
+logger = logging.getLogger(__name__)
+
+def numeric_columns(df):
+    """Numeric columns of any width (int8 ... float64, nullable ints); not bools"""
+    return df.select_dtypes(include="number").columns
+
+def text_columns(df):
+    """Text columns whether stored as object, string/str or category"""
+    return df.select_dtypes(include=["object", "string", "category"]).columns
+
+def _downcast_numeric(series):
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return pd.to_numeric(series, downcast="integer")
+    if series.dtype == np.float64:
+        narrow = series.astype(np.float32)
+        # Only keep float32 when every value survives the round trip exactly
+        same = (narrow.astype(np.float64) == series) | series.isna()
+        return narrow if same.all() else series
+    return series
+
+def _compact_text(series, category_ratio):
+    if pd.api.types.infer_dtype(series, skipna=True) not in ("string", "empty"):
+        return series  # mixed Python objects: leave untouched
+    non_null = series.count()
+    if non_null and series.nunique() <= category_ratio * non_null:
+        return series.astype("category")
+    return series.astype(_STRING_DTYPE) if _STRING_DTYPE is not None else series
+
+def optimize_dtypes(df, category_ratio=None):
+    """Shrink a frame's memory footprint without changing its values
+
+    Integers are downcast to the smallest width that holds them and float64
+    columns to float32 where that is lossless. Text columns with at most
+    ``category_ratio`` (default ``settings.CATEGORY_RATIO``) distinct values
+    per non-null value become ``category``; other text becomes the
+    pyarrow-backed string dtype when pyarrow is installed.
+    """
+    if category_ratio is None:
+        category_ratio = settings.CATEGORY_RATIO
+    before = df.memory_usage(deep=True).sum()
+    optimized = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series.dtype):
+            continue
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            optimized[col] = _downcast_numeric(series)
+        elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            optimized[col] = _compact_text(series, category_ratio)
+    df = df.assign(**optimized) if optimized else df
+    after = df.memory_usage(deep=True).sum()
+    logger.info(f"Optimized dtypes: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+    return df
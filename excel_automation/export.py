@@ -0,0 +1,93 @@
+"""Writing processed data to CSV or Excel"""
+import itertools
+import logging
+
+from . import settings
+from .metrics import instrument
+from .streaming import is_chunked
+from .workspace import atomic_write
+
+logger = logging.getLogger(__name__)
+
+def _chunk_rows(chunk):
+    # Python scalars with None for missing values, as the Excel writers expect
+    values = chunk.astype(object).where(chunk.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+def write_excel(data, path):
+    """Stream a DataFrame or chunk iterator into an .xlsx file
+
+    Uses xlsxwriter's constant_memory mode, which flushes each row to disk
+    as it is written, falling back to openpyxl's write-only workbook when
+    xlsxwriter is not installed. Rows past Excel's sheet limit continue on a
+    new sheet. Returns the number of rows written.
+    """
+    # Excel libraries are imported on first use to keep the engine's import cheap
+    try:
+        import xlsxwriter
+    except ImportError:  # fall back to openpyxl's write-only mode
+        xlsxwriter = None
+    if xlsxwriter is not None:
+        wb = xlsxwriter.Workbook(path, {
+            "constant_memory": True,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        })
+
+        def add_sheet():
+            ws, row_numbers = wb.add_worksheet(), itertools.count()
+            return lambda row: ws.write_row(next(row_numbers), 0, row)
+    else:
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+
+        def add_sheet():
+            return wb.create_sheet().append
+
+    try:
+        append, sheet_rows, rows, header = None, 0, 0, []
+        for chunk in (data if is_chunked(data) else [data]):
+            if append is None:
+                header = [str(c) for c in chunk.columns]
+            for row in _chunk_rows(chunk):
+                if append is None or sheet_rows == settings.EXCEL_MAX_ROWS:
+                    append, sheet_rows = add_sheet(), 1
+                    append(header)
+                append(row)
+                sheet_rows += 1
+            rows += len(chunk)
+        if append is None:  # empty input: still produce a valid workbook
+            add_sheet()(header)
+    finally:
+        if xlsxwriter is not None:
+            wb.close()
+        else:
+            wb.save(path)
+    return rows
+
+@instrument("export")
+def export_data(data, path, errors="log"):
+    """Write a DataFrame or chunk iterator to CSV or Excel
+
+    Chunks are appended as they arrive, so only one chunk is held in memory.
+    The file is written under a temporary name and renamed into place when
+    complete. Returns the number of rows written, or 0 after logging a
+    failure; with ``errors="raise"`` the failure is re-raised instead.
+    """
+    try:
+        logger.info(f"Exporting data to {path}")
+        with atomic_write(path) as tmp_path:
+            if path.endswith(".csv"):
+                rows = 0
+                for i, chunk in enumerate(data if is_chunked(data) else [data]):
+                    chunk.to_csv(tmp_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+                    rows += len(chunk)
+            else:
+                rows = write_excel(data, tmp_path)
+        logger.info(f"Exported {rows} rows to {path}")
+        return rows
+    except Exception as e:
+        logger.error(f"Error exporting data to {path}: {e}")
+        if errors == "raise":
+            raise
+        return 0
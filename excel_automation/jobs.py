@@ -0,0 +1,88 @@
+"""Running pipeline work in the background and tracking its progress"""
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+class Job:
+    """Handle on work submitted to a ``JobRunner``
+
+    ``progress`` (0 to 1) and ``message`` are updated by the running work
+    through ``report``; ``key`` identifies what the job computes, so callers
+    can attach to a running job instead of starting the same work again.
+    """
+
+    def __init__(self, key=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.progress = 0.0
+        self.message = "Queued"
+        self.future = None
+        self._lock = threading.Lock()
+
+    def report(self, progress, message=None):
+        with self._lock:
+            self.progress = min(max(progress, 0.0), 1.0)
+            if message is not None:
+                self.message = message
+
+    @property
+    def status(self):
+        if self.future is None or not self.future.running() and not self.future.done():
+            return "queued"
+        if not self.future.done():
+            return "running"
+        return "failed" if self.future.exception() is not None else "done"
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes or ``timeout`` passes; True if finished"""
+        return bool(wait([self.future], timeout).done)
+
+    def result(self, timeout=None):
+        """The work's return value; re-raises its exception if it failed"""
+        return self.future.result(timeout)
+
+class JobRunner:
+    """Thread pool that runs submitted work off the caller's thread
+
+    ``workers`` defaults to ``settings.JOB_WORKERS``. Threads rather than
+    processes are used so jobs share in-process caches such as
+    ``StepCache``; the heavy pandas work releases the GIL for much of its
+    run time.
+    """
+
+    def __init__(self, workers=None):
+        self._pool = ThreadPoolExecutor(max_workers=workers or settings.JOB_WORKERS,
+                                        thread_name_prefix="excel-automation-job")
+
+    def submit(self, func, *args, key=None, **kwargs):
+        """Run ``func(*args, progress=job.report, **kwargs)`` in the background
+
+        Returns the ``Job`` tracking it.
+        """
+        job = Job(key)
+
+        def run():
+            job.report(0.0, "Running")
+            try:
+                result = func(*args, progress=job.report, **kwargs)
+            except Exception as e:
+                logger.error(f"Background job {job.id} failed: {e}")
+                job.report(job.progress, "Failed")
+                raise
+            job.report(1.0, "Done")
+            return result
+
+        job.future = self._pool.submit(run)
+        logger.info(f"Submitted background job {job.id}")
+        return job
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,322 @@
+"""Reading Excel/CSV inputs, streaming readers and the parsed-file cache"""
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import io
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from . import settings
+from .dtypes import optimize_dtypes
+from .metrics import instrument
+from .validation import RuleSyntaxError, rule_columns, rule_mask
+from .streaming import feather
+from .workspace import atomic_write
+
+logger = logging.getLogger(__name__)
+
+def file_digest(file):
+    """SHA-256 hex digest of a file path or file-like object's contents"""
+    h = hashlib.sha256()
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+    elif hasattr(file, "getvalue"):  # Streamlit UploadedFile / BytesIO
+        h.update(file.getvalue())
+    else:
+        pos = file.tell()
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            h.update(block)
+        file.seek(pos)
+    return h.hexdigest()
+
+def _cache_path(digest):
+    return os.path.join(settings.CACHE_DIR, f"{digest}.arrow")
+
+def cache_get(digest, columns=None):
+    """Return the cached frame for ``digest`` (memory-mapped), or None
+
+    ``columns`` reads only those columns from the cached file; like
+    ``usecols`` it may also be a callable accepting column names.
+    """
+    path = _cache_path(digest)
+    if feather is None:
+        return None
+    try:
+        os.utime(path)  # mark as recently used for LRU eviction
+        table = feather.read_table(path, columns=None if callable(columns) else columns, memory_map=True)
+        if callable(columns):  # memory-mapped, so unselected columns are never read
+            table = table.select([c for c in table.column_names if columns(c)])
+        return table.to_pandas()
+    except FileNotFoundError:  # never cached, or evicted by another process
+        return None
+
+def cache_put(digest, df):
+    """Store ``df`` in the cache, then evict least recently used entries"""
+    if feather is None:
+        return
+    os.makedirs(settings.CACHE_DIR, exist_ok=True)
+    try:
+        with atomic_write(_cache_path(digest)) as tmp_path:
+            # Uncompressed IPC so repeat loads can be memory-mapped without copying
+            feather.write_feather(df, tmp_path, compression="uncompressed")
+    except Exception as e:
+        logger.warning(f"Could not cache parsed frame {digest}: {e}")
+        return
+    evict_cache()
+
+def evict_cache(max_bytes=None):
+    """Delete least recently used cache entries until under ``max_bytes``"""
+    if max_bytes is None:
+        max_bytes = settings.CACHE_MAX_BYTES
+    if not os.path.isdir(settings.CACHE_DIR):
+        return
+    entries = []
+    for entry in os.scandir(settings.CACHE_DIR):
+        if entry.name.endswith(".arrow") and not entry.name.startswith("."):
+            with contextlib.suppress(FileNotFoundError):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        # Another process may be evicting the same entry concurrently
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+            logger.info(f"Evicted cached frame {os.path.basename(path)}")
+        total -= size
+
+def resolve_excel_engine(engine="auto"):
+    """Pick the pandas read_excel engine to use
+
+    ``"auto"`` chooses the fastest installed reader from
+    ``settings.EXCEL_ENGINE_PREFERENCE``; openpyxl, a hard dependency, is the
+    final fallback. Any other value is passed through unchanged.
+    """
+    if engine != "auto":
+        return engine
+    for candidate, module in settings.EXCEL_ENGINE_PREFERENCE:
+        if importlib.util.find_spec(module) is not None:
+            return candidate
+    return "openpyxl"
+
+def _wanted(col, exact, lowered):
+    return col in exact or isinstance(col, str) and col.lower() in lowered
+
+def _needed_columns(columns, predicate):
+    # Columns to read so that both the projection and the filter can be
+    # applied. Filter identifiers match case-insensitively, as in rule_mask,
+    # so they become a usecols-style callable (a partial, so it pickles for
+    # load_sheets' worker processes) rather than names the header must hold
+    if columns is None:
+        return None
+    if predicate is None:
+        return list(columns)
+    try:
+        names = rule_columns(predicate)
+    except RuleSyntaxError:
+        return None  # sqlite-only filter: its column references are unknown
+    return functools.partial(_wanted, exact=frozenset([*columns, *names]),
+                             lowered=frozenset(name.lower() for name in names))
+
+def _project(df, columns, predicate):
+    if predicate is not None:
+        df = df[rule_mask(df, predicate)]
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+def _project_chunks(chunks, columns, predicate):
+    for chunk in chunks:
+        yield _project(chunk, columns, predicate)
+
+@instrument("load")
+def load_data(file, chunksize=None, use_cache=True, sheet_name=0, concat_sheets=False, engine="auto",
+              optimize=False, columns=None, filters=None, errors="log"):
+    """Load Excel or CSV into pandas DataFrame
+
+    With ``chunksize`` set, the input is streamed and an iterator of
+    DataFrames holding at most ``chunksize`` rows each is returned instead.
+    Whole-file loads are cached by content hash (see ``cache_get``).
+    ``sheet_name`` selects a workbook sheet by position or name; ``None``
+    (all sheets) or a list loads several sheets in parallel via
+    ``load_sheets``. ``engine`` picks the Excel reader (see
+    ``resolve_excel_engine``). ``optimize`` shrinks whole-frame loads with
+    ``optimize_dtypes`` (compact numerics, arrow strings, categories).
+
+    ``columns`` projects the result and ``filters`` (a rule predicate or a
+    list of predicates, all of which must hold) keeps only matching rows.
+    Both are pushed into the readers: only the needed columns are parsed,
+    and CSV rows are filtered chunk by chunk as they are read.
+
+    Failures are logged and None is returned; with ``errors="raise"`` they
+    are re-raised after logging instead.
+    """
+    try:
+        logger.info(f"Loading file: {file}")
+        name = file if isinstance(file, str) else file.name  # Streamlit UploadedFile
+        if isinstance(filters, (list, tuple)):
+            filters = " AND ".join(f"({f})" for f in filters) if filters else None
+        projected = columns is not None or filters is not None
+        needed = _needed_columns(columns, filters)
+        if needed is not None:
+            detail = f" and the filter {filters!r}" if filters is not None else ""
+            logger.info(f"Reading only the columns {list(columns)}{detail} need from {name}")
+
+        if chunksize is not None:
+            logger.info(f"Streaming {name} in chunks of {chunksize} rows")
+            if name.endswith(".csv"):
+                chunks = pd.read_csv(file, chunksize=chunksize, usecols=needed)
+            else:
+                chunks = iter_excel_chunks(file, chunksize, sheet_name, columns=needed)
+            return _project_chunks(chunks, columns, filters) if projected else chunks
+
+        if not name.endswith(".csv") and (sheet_name is None or isinstance(sheet_name, list)):
+            sheets = load_sheets(file, sheet_name, concat=concat_sheets, engine=engine, usecols=needed)
+            if concat_sheets:
+                if projected:
+                    sheets = _project(sheets, None if columns is None else [*columns, "sheet"], filters)
+                return optimize_dtypes(sheets) if optimize else sheets
+            return {
+                sheet: optimize_dtypes(_project(df, columns, filters)) if optimize else _project(df, columns, filters)
+                for sheet, df in sheets.items()
+            }
+
+        digest = file_digest(file) if use_cache else None
+        if digest and sheet_name != 0:
+            digest = hashlib.sha256(f"{digest}:{sheet_name}".encode()).hexdigest()
+        df = cache_get(digest, needed) if digest else None
+        cached = df is not None
+        if cached:
+            logger.info(f"Loaded {len(df)} rows from cache ({digest[:12]})")
+        elif name.endswith(".csv") and filters is not None:
+            # Filter while reading so rejected rows are never held all at once
+            chunks = pd.read_csv(file, chunksize=settings.DEFAULT_CHUNK_ROWS, usecols=needed)
+            df = pd.concat(list(_project_chunks(chunks, None, filters)), ignore_index=True)
+        elif name.endswith(".csv"):
+            df = pd.read_csv(file, usecols=needed)
+        else:
+            engine = resolve_excel_engine(engine)
+            logger.info(f"Parsing {name} with the {engine} engine")
+            df = pd.read_excel(file, sheet_name=sheet_name, engine=engine, usecols=needed)
+        if digest and not cached and not projected:
+            cache_put(digest, df)
+        if projected:
+            df = _project(df, columns, filters).reset_index(drop=True)
+        logger.info(f"Loaded {len(df)} rows successfully")
+        return optimize_dtypes(df) if optimize else df
+    except Exception as e:
+        logger.error(f"Error loading file {file}: {e}")
+        if errors == "raise":
+            raise
+        return None
+
+def _dedup_header(names):
+    # Rename repeated headers the way the pandas readers do: "Amount",
+    # "Amount.1", ..., skipping suffixes that already exist in the header
+    names, counts = list(names), {}
+    for i, col in enumerate(names):
+        base, count = col, counts.get(col, 0)
+        while count > 0:
+            counts[base] = count + 1
+            col = f"{base}.{count}"
+            count = count + 1 if col in names else counts.get(col, 0)
+        names[i] = col
+        counts[col] = count + 1
+    return names
+
+def iter_excel_chunks(file, chunksize, sheet_name=0, columns=None):
+    """Stream one sheet of a workbook (the first by default) as DataFrame chunks
+
+    Uses openpyxl's read-only mode, which parses rows lazily instead of
+    building the full workbook in memory. ``columns`` keeps only those
+    header names (or those a callable accepts, like ``usecols``), so other
+    cells never reach a DataFrame. Chunks match
+    ``pd.read_excel``: repeated headers are renamed, trailing empty rows are
+    dropped and each chunk's index continues from the previous one.
+    """
+    from openpyxl import load_workbook  # deferred, like the other Excel libraries
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        names = _dedup_header([f"Unnamed: {i}" if c is None else c for i, c in enumerate(header)])
+        if columns is None:
+            columns, pick = names, None
+        else:
+            if callable(columns):
+                columns = [c for c in names if columns(c)]
+            missing = [c for c in columns if c not in names]
+            if missing:
+                raise ValueError(f"Columns not found in sheet: {missing}")
+            indices = [names.index(c) for c in columns]
+            pick = lambda row: tuple(row[i] for i in indices)
+        def frame(batch, start):
+            df = pd.DataFrame.from_records(batch, columns=columns)
+            df.index = pd.RangeIndex(start, start + len(batch))
+            return df
+
+        batch, start, blank = [], 0, 0
+        for row in rows:
+            if all(cell is None for cell in row):
+                blank += 1  # kept only if a non-empty row follows, like read_excel
+                continue
+            empty = (None,) * len(columns)
+            for _ in range(blank):
+                batch.append(empty)
+            blank = 0
+            batch.append(row if pick is None else pick(row))
+            while len(batch) >= chunksize:
+                yield frame(batch[:chunksize], start)
+                batch, start = batch[chunksize:], start + chunksize
+        if batch:
+            yield frame(batch, start)
+    finally:
+        wb.close()
+
+def _read_sheet(source, sheet_name, engine, usecols):
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return pd.read_excel(source, sheet_name=sheet_name, engine=engine, usecols=usecols)
+
+def load_sheets(file, sheet_names=None, workers=None, concat=False, engine="auto", usecols=None):
+    """Parse several sheets of a workbook concurrently
+
+    openpyxl parsing is CPU-bound, so each sheet is read in its own worker
+    process (``workers`` defaults to the CPU count). ``sheet_names=None``
+    loads every sheet. Returns a dict of DataFrames keyed by sheet name, or
+    with ``concat=True`` one frame with an added ``sheet`` column.
+    ``usecols`` limits parsing to those columns.
+    """
+    source = file if isinstance(file, str) else file.getvalue()
+    if sheet_names is None:
+        from openpyxl import load_workbook
+
+        wb = load_workbook(io.BytesIO(source) if isinstance(source, bytes) else source, read_only=True)
+        sheet_names = wb.sheetnames
+        wb.close()
+    engine = resolve_excel_engine(engine)
+    workers = min(workers or os.cpu_count() or 1, len(sheet_names))
+    logger.info(f"Loading {len(sheet_names)} sheets with {workers} workers")
+    if workers <= 1:
+        frames = [_read_sheet(source, name, engine, usecols) for name in sheet_names]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(_read_sheet, itertools.repeat(source), sheet_names,
+                                   itertools.repeat(engine), itertools.repeat(usecols)))
+    sheets = dict(zip(sheet_names, frames))
+    logger.info(f"Loaded {sum(len(df) for df in frames)} rows from {len(sheets)} sheets")
+    if concat:
+        return pd.concat([df.assign(sheet=name) for name, df in sheets.items()], ignore_index=True)
+    return sheets
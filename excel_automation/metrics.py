@@ -0,0 +1,154 @@
+"""Per-step instrumentation emitted as structured JSON log records"""
+import collections
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+
+import pandas as pd
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+_recent = collections.deque(maxlen=settings.METRICS_HISTORY)
+
+def _rows(value):
+    if isinstance(value, tuple) and value:
+        value = value[0]  # e.g. validate_rules' (valid, violations)
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value  # exports return the number of rows written
+    return None
+
+def _rss_mb():
+    # Current resident set size; ru_maxrss is only the process's lifetime
+    # high-water mark, which says nothing about any one step
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):  # no procfs, e.g. macOS or Windows
+        return None
+
+class _PeakRss:
+    """Highest RSS over a step, polled every ``settings.RSS_SAMPLE_SECONDS``
+
+    Catches memory a step allocates and frees again, which comparing RSS
+    before and after would miss.
+    """
+
+    def __init__(self):
+        self.start = self.peak = _rss_mb()
+        self._done = threading.Event()
+        self._thread = None
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._poll, name="excel-automation-rss", daemon=True)
+            self._thread.start()
+
+    def _poll(self):
+        while not self._done.wait(settings.RSS_SAMPLE_SECONDS):
+            self.peak = max(self.peak, _rss_mb())
+
+    def stop(self):
+        if self._thread is not None:
+            self._done.set()
+            self._thread.join()
+            self.peak = max(self.peak, _rss_mb())
+
+def _start_trace():
+    if settings.TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+def _emit(record, rss):
+    rss.stop()
+    record["peak_rss_mb"] = rss.peak
+    record["peak_rss_delta_mb"] = rss.peak - rss.start if rss.start is not None else None
+    record["tracemalloc_peak_mb"] = (tracemalloc.get_traced_memory()[1] / 2**20
+                                     if tracemalloc.is_tracing() else None)
+    _recent.append(record)
+    logger.info(json.dumps(record))
+
+def _timed_chunks(chunks, record, rss):
+    # Lazily streamed results: time only the work done producing each chunk
+    rows = 0
+    try:
+        while True:
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                record["wall_seconds"] += time.perf_counter() - wall
+                record["cpu_seconds"] += time.thread_time() - cpu
+            rows += len(chunk)
+            yield chunk
+    except BaseException:
+        record["status"] = "error"
+        raise
+    finally:
+        record["rows_out"] = rows
+        _emit(record, rss)
+
+def instrument(step):
+    """Decorator recording wall/CPU time, rows in/out and memory of a step
+
+    Each call emits one JSON record through the ``excel_automation.metrics``
+    logger and keeps it for ``recent_metrics``. CPU time is that of the
+    calling thread. ``peak_rss_mb`` is the process's highest resident
+    memory while the step ran, sampled by a polling thread, and
+    ``peak_rss_delta_mb`` how far that rose above its level at the start
+    (Linux only; steps running concurrently share them). The step's
+    tracemalloc peak is reported when ``settings.TRACE_MEMORY`` is on
+    (e.g. ``--trace-memory`` on the CLI) and covers all threads. When the
+    step returns a chunk stream, the record is emitted once the stream is
+    exhausted.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            data = args[0] if args else None
+            record = {"event": "step_metrics", "step": step, "status": "ok",
+                      "rows_in": len(data) if isinstance(data, pd.DataFrame) else None}
+            _start_trace()
+            rss = _PeakRss()
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                record["status"] = "error"
+                raise
+            finally:
+                record["wall_seconds"] = time.perf_counter() - wall
+                record["cpu_seconds"] = time.thread_time() - cpu
+                if record["status"] == "error":
+                    _emit(record, rss)
+            if isinstance(result, Iterator):
+                return _timed_chunks(result, record, rss)
+            record["rows_out"] = _rows(result)
+            _emit(record, rss)
+            return result
+        return wrapper
+    return decorator
+
+def recent_metrics():
+    """The most recent step records (up to ``settings.METRICS_HISTORY``), oldest first"""
+    return list(_recent)
+
+def metrics_handler(path=None):
+    """File handler writing metrics records as JSON lines to ``path``
+
+    ``path`` defaults to ``settings.METRICS_LOG_FILE``. Attach it to the
+    ``excel_automation.metrics`` logger.
+    """
+    handler = logging.FileHandler(path or settings.METRICS_LOG_FILE)
+    handler.set_name("excel-automation-metrics")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    return handler
@@ -0,0 +1,238 @@
+"""Pipelines as DAGs of cached steps, and running them end to end on one input file"""
+import collections
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from . import settings
+from .cleaning import clean_data
+from .export import export_data
+from .loading import load_data
+from .report import generate_report
+from .streaming import ChunkSpool, is_chunked
+from .validation import load_rules, validate_rules, validate_with_sql
+
+logger = logging.getLogger(__name__)
+
+STEPS = ("clean", "validate", "report")
+
+_MISSING = object()
+
+class StepCache:
+    """Thread-safe LRU mapping of step results that expire after ``ttl`` seconds
+
+    Shares intermediate results between pipeline runs, e.g. across Streamlit
+    reruns. Defaults come from ``settings.STEP_CACHE_MAX_ENTRIES`` and
+    ``settings.STEP_CACHE_TTL_SECONDS``.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or settings.STEP_CACHE_MAX_ENTRIES
+        self.ttl = settings.STEP_CACHE_TTL_SECONDS if ttl is None else ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+@dataclass
+class _Node:
+    name: str
+    func: object
+    deps: tuple = ()
+    args: tuple = ()
+    params: dict = field(default_factory=dict)
+
+class Pipeline:
+    """A DAG of named steps whose intermediate results are cached
+
+    Each step is called as ``func(*dependency_results, *args, **params)``.
+    Its cache key is built from ``source_key`` (e.g. the input's content
+    hash), the step name, its ``params`` and the keys of its dependencies,
+    so a step runs once per distinct input however many downstream steps,
+    runs or pipelines sharing the ``cache`` use it. ``args`` are passed
+    through without being part of the key. A step that raises is not
+    cached, so the next run retries it; steps that would otherwise log and
+    swallow errors should be added with ``errors="raise"``.
+
+    ``run`` executes steps as soon as their dependencies are done, so
+    independent branches (e.g. report and export) run concurrently on a
+    thread pool. ``initializer`` is called in each pool thread.
+    """
+
+    def __init__(self, source_key, cache=None, workers=None, initializer=None):
+        self.source_key = source_key
+        self.cache = {} if cache is None else cache
+        self.workers = workers
+        self.initializer = initializer
+        self.nodes = {}
+
+    def add(self, name, func, deps=(), args=(), **params):
+        """Declare step ``name``; its dependencies must already be declared"""
+        if name in self.nodes:
+            raise ValueError(f"Step {name!r} is already declared")
+        unknown = [dep for dep in deps if dep not in self.nodes]
+        if unknown:
+            raise ValueError(f"Step {name!r} depends on undeclared steps: {', '.join(unknown)}")
+        self.nodes[name] = _Node(name, func, tuple(deps), tuple(args), params)
+        return self
+
+    def key(self, name):
+        """Cache key of step ``name``'s result"""
+        node = self.nodes[name]
+        upstream = tuple(self.key(dep) for dep in node.deps) or (self.source_key,)
+        return (name, repr(sorted(node.params.items())), upstream)
+
+    def _closure(self, targets):
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.nodes[name].deps)
+        return [name for name in self.nodes if name in needed]  # declaration order is topological
+
+    def _compute(self, node, inputs):
+        key = self.key(node.name)
+        result = self.cache.get(key, _MISSING)
+        if result is not _MISSING:
+            logger.info(f"Step {node.name!r} served from cache")
+            return result
+        start = time.perf_counter()
+        result = node.func(*inputs, *node.args, **node.params)
+        logger.info(f"Step {node.name!r} finished in {time.perf_counter() - start:.2f}s")
+        if not isinstance(result, Iterator):  # single-pass chunk streams cannot be reused
+            self.cache[key] = result
+        return result
+
+    def run(self, targets=None, progress=None):
+        """Run ``targets`` (default: every step) and the steps they depend on
+
+        Returns a dict of results for the targets. A chunk stream consumed
+        by several steps is spooled to disk for the duration of the run so
+        each consumer can replay it. ``progress`` is called with the
+        fraction of steps done and a message as each step finishes.
+        """
+        targets = list(self.nodes) if targets is None else list(targets)
+        order = self._closure(targets)
+        consumers = collections.Counter(dep for name in order for dep in self.nodes[name].deps)
+        results, running = {}, {}
+        pending = list(order)
+        with contextlib.ExitStack() as stack:
+            pool = stack.enter_context(ThreadPoolExecutor(max_workers=self.workers, initializer=self.initializer))
+            while pending or running:
+                for name in [n for n in pending if all(dep in results for dep in self.nodes[n].deps)]:
+                    pending.remove(name)
+                    node = self.nodes[name]
+                    running[pool.submit(self._compute, node, [results[dep] for dep in node.deps])] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result = future.result()
+                    if isinstance(result, Iterator) and consumers[name] > 1:
+                        spool = ChunkSpool(stack.enter_context(tempfile.TemporaryDirectory(prefix="pipeline-")))
+                        for chunk in result:
+                            spool.append(chunk)
+                        result = spool
+                    results[name] = result
+                    if progress is not None:
+                        progress(len(results) / len(order), f"Finished {name}")
+        return {name: results[name] for name in targets}
+
+def _stream_violations(pairs, path):
+    with tempfile.TemporaryDirectory(prefix="violations-") as tmp:
+        spool = ChunkSpool(tmp)
+        for valid, violations in pairs:
+            spool.append(violations)
+            yield valid
+        export_data(spool, path, errors="raise")
+
+def _validate_and_record(data, rules, path):
+    """Rows of ``data`` passing ``rules``; the violations table goes to ``path``
+
+    A chunk stream is validated lazily: its violations are spooled to disk
+    and exported once the stream is exhausted.
+    """
+    if is_chunked(data):
+        return _stream_violations(validate_rules(data, rules), path)
+    valid, violations = validate_rules(data, rules)
+    export_data(violations, path, errors="raise")
+    return valid
+
+def run_file(path, steps=STEPS, output=None, rules=None, chunksize=None, output_dir=None, use_cache=True,
+             all_sheets=False, engine="auto", optimize=False, columns=None, filters=None):
+    """Load ``path``, apply ``steps`` in order and export the result
+
+    ``clean`` and ``validate`` transform the data in the order given;
+    ``report`` summarizes the final data. ``rules`` is an optional JSON/YAML
+    rule file for the validate step; its violations are exported next to
+    the output as ``violations.xlsx``. With ``chunksize`` the file is streamed
+    and processed chunk by chunk. Outputs go to ``output_dir`` (default
+    ``settings.OUTPUT_DIR``) unless ``output`` names the data file
+    explicitly. ``all_sheets`` processes every sheet of a workbook as one
+    frame with a ``sheet`` column. ``engine`` selects the Excel reader and
+    ``optimize`` loads with compact dtypes. ``columns`` and ``filters`` are
+    pushed down into ``load_data``. The report and the export run
+    concurrently (see ``Pipeline``). Returns a dict describing the run;
+    a failing step raises, so callers such as the CLI can report it.
+    """
+    violations_file = os.path.basename(settings.OUTPUT_VIOLATIONS_FILE)
+    unknown = set(steps) - set(STEPS)
+    if unknown:
+        raise ValueError(f"Unknown steps: {', '.join(sorted(unknown))}")
+    if output is None:
+        output = (settings.OUTPUT_CLEANED_FILE if output_dir is None
+                  else os.path.join(output_dir, os.path.basename(settings.OUTPUT_CLEANED_FILE)))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    rule = load_rules(rules) if rules else None
+
+    if all_sheets and chunksize:
+        raise ValueError("all_sheets cannot be combined with chunked loading")
+    pipe = Pipeline(path)
+    pipe.add("load", load_data, args=(path,), chunksize=chunksize, use_cache=use_cache,
+             sheet_name=None if all_sheets else 0, concat_sheets=all_sheets, engine=engine,
+             optimize=optimize, columns=columns, filters=filters, errors="raise")
+    last, violations = "load", []
+    for i, step in enumerate(s for s in steps if s != "report"):
+        name = step if step not in pipe.nodes else f"{step}-{i}"
+        if step == "clean":
+            pipe.add(name, clean_data, [last], errors="raise")
+        elif rule is not None:
+            # Rule sets keep an audit trail of the rows they reject
+            stem, ext = os.path.splitext(violations_file)
+            target = os.path.join(os.path.dirname(output), violations_file if name == step else f"{stem}-{i}{ext}")
+            pipe.add(name, _validate_and_record, [last], rules=rule, path=target)
+            violations.append(target)
+        else:
+            pipe.add(name, validate_with_sql, [last], errors="raise")
+        last = name
+
+    pipe.add("export", export_data, [last], path=output, errors="raise")
+    if "report" in steps:
+        pipe.add("report", generate_report, [last], output_dir=output_dir, errors="raise")
+    rows = pipe.run(["report", "export"] if "report" in steps else ["export"])["export"]
+    logger.info(f"Pipeline finished for {path}: {rows} rows written to {output}")
+    return {"input": path, "output": output, "rows": rows, "violations": violations}
@@ -0,0 +1,66 @@
+"""Summary report and chart generation"""
+import logging
+import os
+import tempfile
+from collections.abc import Iterator
+
+import numpy as np
+
+from . import settings
+from .charts import AMOUNT_HISTOGRAM, save_histogram
+from .metrics import instrument
+from .streaming import ChunkSpool, is_chunked
+from .summary import Histogram, SummaryAccumulator
+from .workspace import atomic_write
+
+logger = logging.getLogger(__name__)
+
+@instrument("report")
+def generate_report(df, output_dir=None, errors="log"):
+    """Generate summary statistics and charts
+
+    Accepts a DataFrame or a chunk iterator; statistics are accumulated
+    chunk by chunk. The Amount histogram is binned in a second pass over
+    fixed edges from the first pass's min/max; a single-pass chunk stream
+    keeps only its Amount column on disk for that. Files go to
+    ``output_dir`` (default ``settings.OUTPUT_DIR``). Failures are logged,
+    and re-raised with ``errors="raise"``.
+    """
+    try:
+        logger.info("Generating summary report and charts...")
+        with tempfile.TemporaryDirectory(prefix="report-") as tmp:
+            chunks = df if is_chunked(df) else [df]
+            # Replayable inputs are read again for binning; streams are spooled
+            amounts = ChunkSpool(tmp) if isinstance(chunks, Iterator) else None
+            acc = SummaryAccumulator()
+            low, high = np.inf, -np.inf
+            for chunk in chunks:
+                acc.update(chunk)
+                if "Amount" in chunk.columns:
+                    values = chunk["Amount"].to_numpy(dtype=float, na_value=np.nan)
+                    values = values[np.isfinite(values)]
+                    if len(values):
+                        low, high = min(low, values.min()), max(high, values.max())
+                    if amounts is not None:
+                        amounts.append(chunk[["Amount"]])
+            hist = None
+            if low <= high:
+                hist = Histogram.from_range(low, high, AMOUNT_HISTOGRAM["bins"])
+                for chunk in (amounts if amounts is not None else chunks):
+                    hist.update(chunk["Amount"].to_numpy(dtype=float, na_value=np.nan))
+        summary = acc.to_frame()
+        if output_dir is None:
+            output_dir, report_file = settings.OUTPUT_DIR, settings.OUTPUT_REPORT_FILE
+        else:
+            report_file = os.path.join(output_dir, os.path.basename(settings.OUTPUT_REPORT_FILE))
+        with atomic_write(report_file) as tmp_path:
+            summary.to_excel(tmp_path)
+
+        # Generate histogram if "Amount" column exists
+        if hist is not None:
+            save_histogram(hist, os.path.join(output_dir, "amount_distribution.png"))
+        logger.info("Report and visualization generated successfully")
+    except Exception as e:
+        logger.error(f"Error generating report: {e}")
+        if errors == "raise":
+            raise
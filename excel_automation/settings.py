@@ -0,0 +1,69 @@
+"""Output locations and tuning knobs shared by the pipeline modules
+
+Modules read these as ``settings.NAME`` at call time, so they can be
+overridden at runtime (e.g. by the CLI or in tests).
+"""
+import os
+
+# -------------------- Paths --------------------
+OUTPUT_DIR = "output"
+OUTPUT_CLEANED_FILE = os.path.join(OUTPUT_DIR, "cleaned_data.xlsx")
+OUTPUT_REPORT_FILE = os.path.join(OUTPUT_DIR, "summary_report.xlsx")
+OUTPUT_VIOLATIONS_FILE = os.path.join(OUTPUT_DIR, "violations.xlsx")
+OUTPUT_PROCESSED_FILE = os.path.join(OUTPUT_DIR, "processed_output.xlsx")
+LOG_FILE = os.path.join(OUTPUT_DIR, "automation.log")
+METRICS_LOG_FILE = os.path.join(OUTPUT_DIR, "metrics.jsonl")
+
+# Per-session / per-job output directories and how long they are kept
+JOBS_DIR = os.path.join(OUTPUT_DIR, "jobs")
+JOB_TTL_SECONDS = 24 * 60 * 60
+
+# Shared cache of pipeline step results (e.g. across Streamlit reruns)
+STEP_CACHE_MAX_ENTRIES = 64
+STEP_CACHE_TTL_SECONDS = 60 * 60
+
+# Background job runner threads (UI jobs run off the script thread)
+JOB_WORKERS = 4
+
+# Per-step instrumentation: records kept in memory for the UI, and whether
+# to trace Python allocations with tracemalloc (accurate but slows steps)
+METRICS_HISTORY = 200
+TRACE_MEMORY = False
+# How often each step's peak RSS is sampled while it runs
+RSS_SAMPLE_SECONDS = 0.01
+
+# Row budget per chunk when streaming large inputs
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Parsed uploads are cached as Arrow IPC files keyed by content hash
+CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
+CACHE_MAX_BYTES = 1024 ** 3
+
+# Rendered report charts, cached as PNGs keyed by data hash and chart spec
+CHART_CACHE_DIR = os.path.join(CACHE_DIR, "charts")
+CHART_CACHE_MAX_ENTRIES = 256
+
+# Memory budget for row hashes before chunked dedupe spills to disk
+DEDUPE_MEMORY_BYTES = 256 * 1024 ** 2
+DEDUPE_PARTITIONS = 16
+
+# Default validation rule: remove negative amounts
+DEFAULT_RULE = "Amount >= 0"
+RULE_SEVERITIES = ("error", "warning")
+
+# Excel readers tried by load_data(engine="auto"), fastest first, as
+# (pandas engine name, module that must be importable)
+EXCEL_ENGINE_PREFERENCE = [
+    ("calamine", "python_calamine"),
+    ("openpyxl", "openpyxl"),
+]
+
+# optimize_dtypes turns text columns into category at or below this
+# distinct-to-non-null value ratio
+CATEGORY_RATIO = 0.5
+
+# Rows per worksheet in .xlsx files, including the header
+EXCEL_MAX_ROWS = 1_048_576
+
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
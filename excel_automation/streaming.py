@@ -0,0 +1,45 @@
+"""Helpers shared by the chunked (out-of-core) code paths"""
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional; spooling falls back to pickle
+    pa = feather = None
+
+def is_chunked(data):
+    """True if ``data`` is a stream of DataFrame chunks rather than one frame"""
+    return not isinstance(data, pd.DataFrame)
+
+class ChunkSpool:
+    """Temporary on-disk copy of a chunk stream that can be replayed
+
+    Chunks are stored as Arrow IPC files when pyarrow is available, falling
+    back to pickle for frames Arrow cannot represent.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.paths = []
+
+    def append(self, chunk):
+        base = os.path.join(self.directory, f"chunk-{len(self.paths):06d}")
+        if feather is not None:
+            try:
+                table = pa.Table.from_pandas(chunk, preserve_index=True)
+                feather.write_feather(table, f"{base}.arrow")
+                self.paths.append(f"{base}.arrow")
+                return
+            except (pa.ArrowException, TypeError, ValueError):
+                pass
+        chunk.to_pickle(f"{base}.pkl")
+        self.paths.append(f"{base}.pkl")
+
+    def __iter__(self):
+        for path in self.paths:
+            if path.endswith(".arrow"):
+                yield feather.read_table(path, memory_map=True).to_pandas()
+            else:
+                yield pd.read_pickle(path)
@@ -0,0 +1,288 @@
+"""Mergeable streaming summary statistics (the describe() replacement)"""
+import hashlib
+import math
+
+import numpy as np
+import pandas as pd
+
+from .streaming import is_chunked
+
+class KLLSketch:
+    """Mergeable approximate quantile sketch (Karnin-Lang-Liberty)
+
+    Level ``h`` holds items of weight ``2**h``. A level over capacity is
+    sorted and every other item (random offset) is promoted to the next
+    level. Quantiles are exact until the first compaction.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                leftover, items = items[:len(items) % 2], items[len(items) % 2:]
+                promoted = items[self.rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = leftover
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        self.levels[0] = np.concatenate([self.levels[0], values[~np.isnan(values)]])
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def quantiles(self, qs):
+        if len(self.levels) == 1:  # nothing compacted yet: exact answer
+            if not len(self.levels[0]):
+                return [np.nan] * len(qs)
+            return list(np.quantile(self.levels[0], qs))
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values)
+        values, cumulative = values[order], np.cumsum(weights[order])
+        ranks = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1])
+        return list(values[np.minimum(ranks, len(values) - 1)])
+
+class HyperLogLog:
+    """Mergeable approximate distinct counter over 64-bit value hashes"""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, values):
+        # Plain numpy values hash several times faster than a string-dtype Series,
+        # and callers pass distinct values, so factorizing first would not pay off
+        hashes = pd.util.hash_array(pd.Series(values).dropna().to_numpy(), categorize=False)
+        bits = 64 - self.p
+        index = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # frexp's exponent is the bit length; exact since rest has < 53 bits
+        rank = (bits - np.frexp(rest.astype("float64"))[1] + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(2.0 ** -self.registers.astype("float64"))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:  # small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+class FrequentItems:
+    """Mergeable Misra-Gries heavy-hitter summary for top/freq
+
+    Counts are exact while fewer than ``capacity`` distinct values have been
+    seen; beyond that they are lower bounds.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+
+    def _trim(self, counts):
+        if len(counts) <= self.capacity:
+            return counts
+        # Subtract the (capacity + 1)-th largest count and drop what falls to zero
+        values = counts.to_numpy()
+        threshold = np.partition(values, len(values) - self.capacity - 1)[len(values) - self.capacity - 1]
+        keep = values > threshold
+        return pd.Series(values[keep] - threshold, index=counts.index[keep])
+
+    def _merge_counts(self, counts):
+        # Trimming the incoming counts first is itself a Misra-Gries summary
+        # (errors add up across merges), and keeps the alignment to at most
+        # 2 * capacity labels however many distinct values a chunk has
+        counts = self._trim(counts)
+        self.counts = self._trim(counts if self.counts.empty else self.counts.add(counts, fill_value=0))
+
+    def update(self, counts):
+        """Add a chunk's ``value_counts()``"""
+        self._merge_counts(counts)
+
+    def merge(self, other):
+        self._merge_counts(other.counts)
+
+    def top(self):
+        if self.counts.empty:
+            return np.nan, np.nan
+        return self.counts.idxmax(), int(self.counts.max())
+
+class Histogram:
+    """Counts over fixed bin edges, built with ``np.histogram``
+
+    Histograms over the same edges merge by adding counts, so chunks can be
+    binned independently once the edges are fixed (e.g. from a streaming
+    min/max pass). ``from_range`` reproduces the edges ``np.histogram`` and
+    matplotlib pick for data spanning ``[low, high]``.
+    """
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+
+    @classmethod
+    def from_range(cls, low, high, bins=20):
+        return cls(np.histogram_bin_edges(np.array([low, high], dtype=float), bins=bins))
+
+    def update(self, values):
+        """Bin a chunk of values; missing and non-finite values are ignored"""
+        values = np.asarray(values, dtype=float)
+        self.counts += np.histogram(values[np.isfinite(values)], bins=self.edges)[0]
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Histograms with different bin edges cannot be merged")
+        self.counts += other.counts
+
+    def digest(self):
+        """Content hash of the edges and counts"""
+        return hashlib.sha256(self.edges.tobytes() + self.counts.tobytes()).hexdigest()
+
+class NumericSummary:
+    """Count, mean, variance (Chan et al. merge), min/max and KLL quantiles"""
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = KLLSketch()
+
+    def _values(self, series):
+        if pd.api.types.is_datetime64_dtype(self.dtype):
+            return series.dropna().astype("int64").to_numpy(dtype="float64")
+        return pd.to_numeric(series, errors="coerce").dropna().to_numpy(dtype="float64")
+
+    def _combine(self, count, mean, m2, lo, hi):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min, self.max = min(self.min, lo), max(self.max, hi)
+
+    def update(self, series):
+        values = self._values(series)
+        if len(values):
+            mean = values.mean()
+            self._combine(len(values), mean, ((values - mean) ** 2).sum(), values.min(), values.max())
+            self.sketch.update(values)
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+            self.sketch.merge(other.sketch)
+
+    def stats(self):
+        if not self.count:
+            return {"count": 0}
+        q25, q50, q75 = self.sketch.quantiles([0.25, 0.5, 0.75])
+        stats = {
+            "count": self.count, "mean": self.mean,
+            "std": math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan,
+            "min": self.min, "25%": q25, "50%": q50, "75%": q75, "max": self.max,
+        }
+        if pd.api.types.is_datetime64_dtype(self.dtype):
+            unit, _ = np.datetime_data(self.dtype)
+            stats = {k: v if k in ("count", "std") else pd.Timestamp(int(v), unit=unit) for k, v in stats.items()}
+            del stats["std"]
+        return stats
+
+class CategoricalSummary:
+    """Count, approximate distinct count and top/freq for non-numeric columns"""
+
+    def __init__(self):
+        self.count = 0
+        self.distinct = HyperLogLog()
+        self.frequent = FrequentItems()
+
+    def update(self, series):
+        # Hash only the chunk's distinct values: repeats cannot change the HLL
+        counts = series.value_counts(dropna=True)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            counts = counts[counts.to_numpy() > 0]  # unused categories are reported too
+        self.count += int(counts.sum())
+        self.distinct.update(counts.index)
+        self.frequent.update(counts)
+
+    def merge(self, other):
+        self.count += other.count
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+
+    def stats(self):
+        top, freq = self.frequent.top()
+        return {"count": self.count, "unique": self.distinct.count(), "top": top, "freq": freq}
+
+SUMMARY_ROWS = ["count", "unique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+class SummaryAccumulator:
+    """Mergeable per-column summary statistics, fed one chunk at a time
+
+    Produces the same layout as ``DataFrame.describe(include="all")`` using
+    bounded memory: quantiles come from KLL sketches and distinct counts
+    from HyperLogLog, so both are approximate on large inputs.
+    """
+
+    def __init__(self):
+        self.columns = {}
+
+    def _new_column(self, series):
+        dtype = series.dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            return CategoricalSummary()
+        if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_dtype(dtype):
+            return NumericSummary(dtype)
+        return CategoricalSummary()
+
+    def update(self, df):
+        for col in df.columns:
+            if col not in self.columns:
+                self.columns[col] = self._new_column(df[col])
+            self.columns[col].update(df[col])
+        return self
+
+    def merge(self, other):
+        for col, summary in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(summary)
+            else:
+                self.columns[col] = summary
+        return self
+
+    def to_frame(self):
+        summary = pd.DataFrame({col: pd.Series(s.stats(), dtype=object) for col, s in self.columns.items()})
+        return summary.reindex(SUMMARY_ROWS).dropna(how="all")
+
+def summarize(data):
+    """Summary statistics for a DataFrame or chunk iterator (see SummaryAccumulator)"""
+    chunks = data if is_chunked(data) else [data]
+    acc = SummaryAccumulator()
+    for chunk in chunks:
+        acc.update(chunk)
+    return acc.to_frame()
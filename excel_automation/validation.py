@@ -0,0 +1,400 @@
+"""SQL-style validation rules compiled to vectorized pandas masks"""
+import functools
+import json
+import logging
+import operator
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from . import settings
+from .metrics import instrument
+from .streaming import is_chunked
+
+logger = logging.getLogger(__name__)
+
+class RuleSyntaxError(ValueError):
+    """Raised for predicates the vectorized rule engine cannot compile"""
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>\s+|--[^\n]*)
+  | (?P<number>\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<quoted>"(?:[^"]|"")*"|\[[^\]]*\]|`[^`]*`)
+  | (?P<op><=|>=|<>|!=|==|=|<|>|\(|\)|,|-)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+""", re.VERBOSE)
+
+_COMPARISONS = {
+    "=": operator.eq, "==": operator.eq, "!=": operator.ne, "<>": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+
+def _tokenize(predicate):
+    tokens, pos = [], 0
+    while pos < len(predicate):
+        m = _TOKEN_RE.match(predicate, pos)
+        if not m:
+            raise RuleSyntaxError(f"Unexpected input at {predicate[pos:pos + 10]!r}")
+        pos = m.end()
+        kind, text = m.lastgroup, m.group()
+        if kind == "space":
+            continue
+        if kind == "word" and text.upper() in {"AND", "OR", "NOT", "IN", "BETWEEN", "IS", "NULL", "TRUE", "FALSE"}:
+            kind, text = "keyword", text.upper()
+        tokens.append((kind, text))
+    return tokens
+
+def _identifier(kind, text):
+    return text if kind == "word" else text[1:-1].replace('""', '"')
+
+class _RuleParser:
+    """Recursive-descent parser turning a WHERE-clause predicate into a mask function
+
+    Compiled predicates return a ``(true, false)`` pair of boolean arrays so
+    that NULL handling follows SQL three-valued logic: rows where the
+    predicate is unknown are in neither mask.
+    """
+
+    def __init__(self, predicate):
+        self.tokens = _tokenize(predicate)
+        self.pos = 0
+
+    def parse(self):
+        node = self._or()
+        if self.pos != len(self.tokens):
+            raise RuleSyntaxError(f"Unexpected token {self.tokens[self.pos][1]!r}")
+        return node
+
+    def _peek(self, *texts):
+        if self.pos < len(self.tokens) and self.tokens[self.pos][0] in ("keyword", "op"):
+            return self.tokens[self.pos][1] in texts
+        return False
+
+    def _take(self, *texts):
+        if self._peek(*texts):
+            self.pos += 1
+            return self.tokens[self.pos - 1][1]
+        return None
+
+    def _expect(self, text):
+        if not self._take(text):
+            raise RuleSyntaxError(f"Expected {text!r}")
+
+    def _or(self):
+        node = self._and()
+        while self._take("OR"):
+            left, right = node, self._and()
+            node = lambda df, a=left, b=right: _or_masks(a(df), b(df))
+        return node
+
+    def _and(self):
+        node = self._not()
+        while self._take("AND"):
+            left, right = node, self._not()
+            node = lambda df, a=left, b=right: _and_masks(a(df), b(df))
+        return node
+
+    def _not(self):
+        if self._take("NOT"):
+            inner = self._not()
+            return lambda df: _not_masks(inner(df))
+        return self._predicate()
+
+    def _predicate(self):
+        if self._take("("):
+            node = self._or()
+            self._expect(")")
+            return node
+        left = self._operand()
+        if self._take("IS"):
+            negate = bool(self._take("NOT"))
+            self._expect("NULL")
+            return lambda df: _is_null(left(df), negate)
+        negate = bool(self._take("NOT"))
+        if self._take("IN"):
+            self._expect("(")
+            values = [self._literal()]
+            while self._take(","):
+                values.append(self._literal())
+            self._expect(")")
+            node = lambda df: _in_masks(left(df), values)
+        elif self._take("BETWEEN"):
+            low = self._operand()
+            self._expect("AND")
+            high = self._operand()
+            node = lambda df: _and_masks(
+                _compare(operator.ge, left(df), low(df)),
+                _compare(operator.le, left(df), high(df)),
+            )
+        elif negate:
+            raise RuleSyntaxError("Expected IN or BETWEEN after NOT")
+        else:
+            op = self._take(*_COMPARISONS)
+            if op is None:
+                raise RuleSyntaxError("Expected a comparison operator")
+            right = self._operand()
+            return lambda df: _compare(_COMPARISONS[op], left(df), right(df))
+        return (lambda df: _not_masks(node(df))) if negate else node
+
+    def _next(self):
+        if self.pos >= len(self.tokens):
+            raise RuleSyntaxError("Unexpected end of predicate")
+        self.pos += 1
+        return self.tokens[self.pos - 1]
+
+    def _literal(self):
+        """Parse a literal and return its Python value (None for NULL)"""
+        kind, text = self._next()
+        sign = ""
+        if kind == "op" and text == "-":
+            sign = "-"
+            kind, text = self._next()
+        if kind == "number":
+            text = sign + text
+            return float(text) if any(c in text for c in ".eE") else int(text)
+        if sign:
+            raise RuleSyntaxError("Expected a number after '-'")
+        if kind == "string":
+            return text[1:-1].replace("''", "'")
+        if kind == "keyword" and text in ("TRUE", "FALSE", "NULL"):
+            return {"TRUE": True, "FALSE": False, "NULL": None}[text]
+        raise RuleSyntaxError(f"Unexpected token {text!r}")
+
+    def _operand(self):
+        kind, text = self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+        if kind == "word" or kind == "quoted":
+            self.pos += 1
+            name = _identifier(kind, text)
+            return lambda df: _column(df, name)
+        value = self._literal()
+        if value is None:
+            return lambda df: (None, np.ones(len(df), dtype=bool))
+        return lambda df: (value, np.zeros(len(df), dtype=bool))
+
+def _resolve(df, name):
+    # SQL identifiers are case-insensitive; prefer an exact match
+    if name in df.columns:
+        return name
+    matches = [col for col in df.columns if isinstance(col, str) and col.lower() == name.lower()]
+    if len(matches) != 1:
+        raise RuleSyntaxError(f"No unique column {name!r}")
+    return matches[0]
+
+def _column(df, name):
+    series = df[_resolve(df, name)]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Compare on the underlying values; unordered categoricals reject < and >
+        series = series.astype(series.cat.categories.dtype)
+    return series, series.isna().to_numpy()
+
+def _as_mask(values, length):
+    if isinstance(values, (pd.Series, pd.api.extensions.ExtensionArray, np.ndarray)):
+        return pd.Series(values).to_numpy(dtype=bool, na_value=False)
+    return np.full(length, bool(values))
+
+def _check_affinity(values, literals):
+    # sqlite converts between '100' and 100 when one side is a column with
+    # numeric or text affinity; pandas would just compare unequal, so leave
+    # such rules to sqlite
+    if not isinstance(values, pd.Series):
+        return
+    if pd.api.types.is_numeric_dtype(values.dtype) and any(isinstance(v, str) for v in literals):
+        raise RuleSyntaxError("String literal compared with a numeric column")
+    if (pd.api.types.is_string_dtype(values.dtype)
+            and any(isinstance(v, (int, float)) for v in literals)):
+        raise RuleSyntaxError("Numeric literal compared with a text column")
+
+def _compare(op, left, right):
+    (lvalues, lnull), (rvalues, rnull) = left, right
+    _check_affinity(lvalues, [rvalues])
+    _check_affinity(rvalues, [lvalues])
+    null = lnull | rnull
+    if null.all():  # comparisons with NULL are never true or false
+        return np.zeros_like(null), np.zeros_like(null)
+    result = _as_mask(op(lvalues, rvalues), len(null))
+    return result & ~null, ~result & ~null
+
+def _in_masks(left, values):
+    lvalues, lnull = left
+    if not isinstance(lvalues, pd.Series):
+        raise RuleSyntaxError("IN needs a column on the left-hand side")
+    literals = [v for v in values if v is not None]
+    _check_affinity(lvalues, literals)
+    found = _as_mask(lvalues.isin(literals), len(lnull))
+    if len(literals) < len(values):  # x IN (..., NULL) is unknown, not false, when x is absent
+        return found & ~lnull, np.zeros_like(found)
+    return found & ~lnull, ~found & ~lnull
+
+def _is_null(operand, negate):
+    _, null = operand
+    return (~null, null) if negate else (null, ~null)
+
+def _not_masks(a):
+    return a[1], a[0]
+
+def _and_masks(a, b):
+    return a[0] & b[0], a[1] | b[1]
+
+def _or_masks(a, b):
+    return a[0] | b[0], a[1] & b[1]
+
+@functools.lru_cache(maxsize=128)
+def compile_rule(predicate):
+    """Compile a SQL-style predicate into a function returning a row mask
+
+    Supports comparisons, IN, BETWEEN, IS [NOT] NULL, AND/OR/NOT and
+    parentheses. Raises RuleSyntaxError for anything else.
+    """
+    node = _RuleParser(predicate).parse()
+    return lambda df: node(df)[0]
+
+def rule_columns(predicate):
+    """Names of the columns a predicate reads
+
+    Raises RuleSyntaxError for predicates ``compile_rule`` cannot handle,
+    since their identifiers may be SQL functions rather than columns.
+    """
+    compile_rule(predicate)
+    names = [_identifier(kind, text) for kind, text in _tokenize(predicate) if kind in ("word", "quoted")]
+    return list(dict.fromkeys(names))
+
+def _sqlite_mask(df, predicate):
+    import sqlite3  # deferred: only predicates the compiler rejects need it
+
+    conn = sqlite3.connect(":memory:")
+    try:
+        df.assign(__row__=np.arange(len(df))).to_sql("data", conn, index=False, if_exists="replace")
+        rows = pd.read_sql_query(f"SELECT __row__ FROM data WHERE {predicate}", conn)["__row__"]
+    finally:
+        conn.close()
+    mask = np.zeros(len(df), dtype=bool)
+    mask[rows.to_numpy(dtype=np.int64)] = True
+    return mask
+
+def rule_mask(df, predicate):
+    """Boolean mask of rows satisfying ``predicate``
+
+    Evaluated as vectorized pandas operations when the predicate compiles,
+    otherwise by running it as a WHERE clause against an in-memory sqlite copy.
+    """
+    try:
+        return compile_rule(predicate)(df)
+    except (RuleSyntaxError, TypeError) as e:
+        logger.info(f"Rule {predicate!r} not vectorized ({e}); falling back to sqlite")
+        return _sqlite_mask(df, predicate)
+
+@dataclass
+class Rule:
+    """A named validation rule: rows must satisfy ``predicate``"""
+    name: str
+    predicate: str
+    severity: str = "error"  # "error" rejects the row, "warning" only reports it
+
+def load_rules(source):
+    """Load a rule set from a JSON or YAML file (path or uploaded file)
+
+    The document is either a list of rules or a mapping with a ``rules``
+    list; each rule has ``name``, ``predicate`` and optional ``severity``.
+    """
+    name = source if isinstance(source, str) else source.name
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        # getvalue() does not depend on the read position, so an uploaded
+        # file can be loaded again on every Streamlit rerun
+        text = source.getvalue() if hasattr(source, "getvalue") else source.read()
+        text = text.decode("utf-8") if isinstance(text, bytes) else text
+    if name.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is required to load YAML rule files") from None
+        doc = yaml.safe_load(text)
+    else:
+        doc = json.loads(text)
+    if isinstance(doc, dict):
+        doc = doc.get("rules", [])
+    rules = [Rule(**entry) for entry in doc]
+    for rule in rules:
+        if rule.severity not in settings.RULE_SEVERITIES:
+            raise ValueError(f"Rule {rule.name!r} has unknown severity {rule.severity!r}")
+    logger.info(f"Loaded {len(rules)} validation rules from {name}")
+    return rules
+
+@instrument("validate_rules")
+def validate_rules(df, rules):
+    """Evaluate every rule over ``df`` and split it into valid rows and violations
+
+    Each row gets a bitmask with bit ``i`` set when it fails ``rules[i]``.
+    Returns ``(valid_df, violations)``: the rows passing every error-severity
+    rule, and a table of offending rows (``row``, ``failed_rules``,
+    ``severity``, ``bitmask``). A chunk iterator yields one pair per chunk.
+    """
+    # Chunks go through the uninstrumented helper: one metrics record per call
+    if is_chunked(df):
+        return (_validate_rules(chunk, rules) for chunk in df)
+    return _validate_rules(df, rules)
+
+def _validate_rules(df, rules):
+    if len(rules) > 64:
+        raise ValueError("At most 64 rules can be evaluated together")
+    logger.info(f"Evaluating {len(rules)} validation rules...")
+    bits = np.zeros(len(df), dtype=np.uint64)
+    error_bits = np.uint64(0)
+    for i, rule in enumerate(rules):
+        bit = np.uint64(1) << np.uint64(i)
+        bits[~rule_mask(df, rule.predicate)] |= bit
+        if rule.severity == "error":
+            error_bits |= bit
+
+    failed = bits != 0
+    failed_bits = bits[failed]
+    labels = {
+        mask: ", ".join(r.name for i, r in enumerate(rules) if mask >> np.uint64(i) & np.uint64(1))
+        for mask in np.unique(failed_bits)
+    }
+    violations = pd.DataFrame({
+        "row": df.index[failed],
+        "failed_rules": [labels[m] for m in failed_bits],
+        "severity": np.where(failed_bits & error_bits, "error", "warning"),
+        "bitmask": failed_bits,
+    })
+    valid_df = df[(bits & error_bits) == 0].reset_index(drop=True)
+    logger.info(f"Rule evaluation complete: {len(violations)} rows violate at least one rule, "
+                 f"{len(df) - len(valid_df)} rejected")
+    return valid_df, violations
+
+@instrument("validate")
+def validate_with_sql(df, rule=None, errors="log"):
+    """Apply SQL validation rules
+
+    ``rule`` is a SQL WHERE-clause predicate or a list of ``Rule``; rows not
+    satisfying it are removed. Defaults to ``settings.DEFAULT_RULE``. A
+    chunk iterator is validated lazily, one chunk at a time. Data that
+    cannot be validated is logged and passed through unchanged, or
+    re-raised with ``errors="raise"``.
+    """
+    if rule is None:
+        rule = settings.DEFAULT_RULE
+    if is_chunked(df):
+        return (_validate_with_sql(chunk, rule, errors) for chunk in df)
+    return _validate_with_sql(df, rule, errors)
+
+def _validate_with_sql(df, rule, errors):
+    try:
+        logger.info("Applying SQL validation rules...")
+        if isinstance(rule, str):
+            validated_df = df[rule_mask(df, rule)].reset_index(drop=True)
+        else:
+            validated_df, _ = _validate_rules(df, rule)
+        logger.info(f"Validation complete: {len(df) - len(validated_df)} invalid rows removed")
+        return validated_df
+    except Exception as e:
+        logger.error(f"SQL validation failed: {e}")
+        if errors == "raise":
+            raise
+        return df
@@ -0,0 +1,78 @@
+"""Per-job output directories, atomic file writes and the TTL janitor
+
+Concurrent users (Streamlit sessions, batch workers) each write into their
+own job directory, and every output file is written to a temporary name and
+renamed into place, so readers never see a half-written file.
+"""
+import contextlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """Yield a temporary path next to ``path``; rename it over ``path`` on success
+
+    The temporary name keeps the extension, since writers such as
+    ``to_excel`` and ``savefig`` pick their format from it.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=os.path.splitext(name)[1])
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+def create_job_dir(base=None):
+    """Create a fresh, uniquely named job directory under ``base``
+
+    ``base`` defaults to ``settings.JOBS_DIR``.
+    """
+    path = os.path.join(base or settings.JOBS_DIR, uuid.uuid4().hex)
+    os.makedirs(path)
+    logger.info(f"Created job directory {path}")
+    return path
+
+def touch_job_dir(path):
+    """Mark a job directory as in use so the janitor keeps it"""
+    os.makedirs(path, exist_ok=True)
+    os.utime(path)
+
+def job_path(job_dir, filename):
+    """Path of an output file (a settings path or bare name) inside ``job_dir``"""
+    return os.path.join(job_dir, os.path.basename(filename))
+
+def cleanup_jobs(base=None, ttl_seconds=None):
+    """Delete job directories untouched for longer than ``ttl_seconds``
+
+    Defaults to ``settings.JOBS_DIR`` and ``settings.JOB_TTL_SECONDS``.
+    Returns the number of directories removed.
+    """
+    base = base or settings.JOBS_DIR
+    ttl_seconds = settings.JOB_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    if not os.path.isdir(base):
+        return 0
+    cutoff = time.time() - ttl_seconds
+    removed = 0
+    for entry in os.scandir(base):
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path)
+                removed += 1
+        except FileNotFoundError:  # removed concurrently by another janitor
+            continue
+    if removed:
+        logger.info(f"Removed {removed} expired job directories from {base}")
+    return removed
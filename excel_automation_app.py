@@ -1,124 +1,159 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-import sqlite3
-import matplotlib.pyplot as plt
+import contextlib
+import io
 import os
 import logging
-import sys
-import io
+import operator
 
-# -------------------- Paths & Setup --------------------
-OUTPUT_DIR = "output"
-OUTPUT_CLEANED_FILE = os.path.join(OUTPUT_DIR, "cleaned_data.xlsx")
-OUTPUT_REPORT_FILE = os.path.join(OUTPUT_DIR, "summary_report.xlsx")
-LOG_FILE = os.path.join(OUTPUT_DIR, "automation.log")
+from excel_automation import (
+    settings, load_data, iter_excel_chunks, clean_data, validate_with_sql, validate_rules, load_rules,
+    generate_report, export_data, create_job_dir, touch_job_dir, job_path, cleanup_jobs, file_digest,
+    Pipeline, StepCache, JobRunner, metrics_handler, recent_metrics,
+)
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# -------------------- Paths & Setup --------------------
+os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
 
 logging.basicConfig(
-    filename=LOG_FILE,
+    filename=settings.LOG_FILE,
     level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
+    format=settings.LOG_FORMAT,
+    datefmt=settings.LOG_DATE_FORMAT
 )
 
-# -------------------- Functions --------------------
-def load_data(file):
-    """Load Excel or CSV into pandas DataFrame"""
-    try:
-        logging.info(f"Loading file: {file}")
-        if isinstance(file, str):
-            if file.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        else:  # Streamlit UploadedFile
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        logging.info(f"Loaded {len(df)} rows successfully")
-        return df
-    except Exception as e:
-        logging.error(f"Error loading file {file}: {e}")
-        st.error(f"❌ Failed to load file: {e}")
-        return None
-
-def clean_data(df):
-    """Clean and validate data"""
+class StreamlitErrorHandler(logging.Handler):
+    """Show errors logged by the pipeline engine in the UI"""
+    streamlit_ui = True
+
+    def emit(self, record):
+        st.error(f"❌ {record.getMessage()}")
+
+# The script re-runs on every interaction; install the handler only once
+engine_logger = logging.getLogger("excel_automation")
+if not any(getattr(h, "streamlit_ui", False) for h in engine_logger.handlers):
+    engine_logger.addHandler(StreamlitErrorHandler(level=logging.ERROR))
+    logging.getLogger("excel_automation.metrics").addHandler(metrics_handler())
+
+# Each browser session writes into its own job directory, so concurrent
+# users never overwrite each other's outputs; stale ones are swept on creation
+if "job_dir" not in st.session_state:
+    cleanup_jobs()
+    st.session_state["job_dir"] = create_job_dir()
+job_dir = st.session_state["job_dir"]
+touch_job_dir(job_dir)
+
+# -------------------- Pipeline --------------------
+# Every widget interaction re-runs this script. The steps are declared as a
+# DAG whose results live in a process-wide cache keyed by the upload's
+# content hash, the step and its parameters, so a rerun only computes the
+# steps not yet run for this upload.
+@st.cache_resource
+def step_cache():
+    return StepCache()
+
+@st.cache_resource
+def job_runner():
+    return JobRunner()
+
+def submit_job(pipe, targets):
+    """The session's background job computing ``targets``
+
+    Unfinished jobs live in session_state keyed by what they compute: a
+    rerun while one is still running attaches to it instead of submitting
+    the same work again, whatever other jobs the rerun waits on first.
+    """
+    key = tuple(pipe.key(target) for target in targets)
+    if "jobs" not in st.session_state:
+        st.session_state["jobs"] = {}
+    jobs = st.session_state["jobs"]
+    if key not in jobs:
+        jobs[key] = job_runner().submit(pipe.run, targets, key=key)
+    return key, jobs[key]
+
+def run_in_background(pipe, targets):
+    """Run ``targets`` as a background job while showing its progress
+
+    Finished jobs are dropped; their results are in the step cache.
+    """
+    key, job = submit_job(pipe, targets)
+    jobs = st.session_state["jobs"]
+    if not job.wait(0.1):  # only show progress for work that takes a while
+        bar = st.progress(job.progress, text=job.message)
+        while not job.wait(0.1):
+            bar.progress(job.progress, text=job.message)
+        bar.empty()
+    jobs.pop(key, None)
     try:
-        logging.info("Cleaning data...")
-        before_rows = len(df)
-
-        # Drop duplicates
-        df = df.drop_duplicates()
-
-        # Fill missing numeric values with mean
-        numeric_cols = df.select_dtypes(include=["int64", "float64"]).columns
-        df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].mean())
-
-        # Fill missing text values with 'Unknown'
-        text_cols = df.select_dtypes(include=["object"]).columns
-        df[text_cols] = df[text_cols].fillna("Unknown")
-
-        after_rows = len(df)
-        logging.info(f"Data cleaned: {before_rows - after_rows} duplicates removed")
-        return df
-    except Exception as e:
-        logging.error(f"Error cleaning data: {e}")
-        st.error(f"❌ Cleaning step failed: {e}")
-        return df
-
-def validate_with_sql(df):
-    """Apply SQL validation rules"""
+        return job.result()
+    except Exception:
+        # The failing step has already shown its error; a rerun retries it
+        st.stop()
+
+def first_rows(upload, rows=5):
+    """The upload's first ``rows`` rows, parsed without reading the rest"""
+    data = io.BytesIO(upload.getvalue())  # own cursor; the background load reads ``upload``
     try:
-        logging.info("Applying SQL validation rules...")
-        conn = sqlite3.connect(":memory:")
-        df.to_sql("data", conn, index=False, if_exists="replace")
-
-        query = """
-        SELECT *
-        FROM data
-        WHERE Amount >= 0  -- remove negative amounts
-        """
-        validated_df = pd.read_sql_query(query, conn)
-        conn.close()
-        logging.info(f"Validation complete: {len(df) - len(validated_df)} invalid rows removed")
-        return validated_df
-    except Exception as e:
-        logging.error(f"SQL validation failed: {e}")
-        st.error(f"❌ SQL validation step failed: {e}")
-        return df
-
-def generate_report(df):
-    """Generate summary statistics and charts"""
-    try:
-        logging.info("Generating summary report and charts...")
-        summary = df.describe(include="all")
-        summary.to_excel(OUTPUT_REPORT_FILE)
-
-        # Generate histogram if "Amount" column exists
-        if "Amount" in df.columns:
-            plt.figure(figsize=(6, 4))
-            df["Amount"].hist(bins=20)
-            plt.title("Distribution of Amounts")
-            plt.xlabel("Amount")
-            plt.ylabel("Frequency")
-            plt.tight_layout()
-            plt.savefig(os.path.join(OUTPUT_DIR, "amount_distribution.png"))
-            plt.close()
-        logging.info("Report and visualization generated successfully")
-    except Exception as e:
-        logging.error(f"Error generating report: {e}")
-        st.error(f"❌ Report generation failed: {e}")
+        if upload.name.endswith(".csv"):
+            return pd.read_csv(data, nrows=rows)
+        with contextlib.closing(iter_excel_chunks(data, rows)) as chunks:
+            return next(chunks, None)
+    except Exception:
+        return None  # the full load reports why the file cannot be read
+
+def validate(df, rules=None):
+    # Rule sets also return the violating rows
+    return validate_rules(df, rules) if rules else (validate_with_sql(df, errors="raise"), None)
+
+def export_file(df, path):
+    # Written once per result; later reruns serve the cached bytes. Raising
+    # on failure keeps another export's stale file at ``path`` from being served
+    export_data(df, path, errors="raise")
+    with open(path, "rb") as f:
+        return f.read()
+
+def build_pipeline(upload, rules, all_sheets, job_dir):
+    ctx = get_script_run_ctx()  # pool threads need it to show errors in the UI
+    pipe = Pipeline(file_digest(upload), cache=step_cache(), initializer=lambda: add_script_run_ctx(ctx=ctx))
+    # Steps raise rather than log and carry on, so failed results are never cached
+    pipe.add("load", load_data, args=(upload,), sheet_name=None if all_sheets else 0, concat_sheets=True,
+             errors="raise")
+    pipe.add("clean", clean_data, ["load"], errors="raise")
+    pipe.add("validate", validate, ["clean"], rules=rules)
+    pipe.add("validated", operator.itemgetter(0), ["validate"])
+    pipe.add("violations", operator.itemgetter(1), ["validate"])
+    pipe.add("report", generate_report, ["validated"], output_dir=job_dir, errors="raise")
+    pipe.add("export_cleaned", export_file, ["clean"], path=job_path(job_dir, settings.OUTPUT_CLEANED_FILE))
+    pipe.add("export_validated", export_file, ["validated"], path=job_path(job_dir, settings.OUTPUT_CLEANED_FILE))
+    pipe.add("export_violations", export_file, ["violations"],
+             path=job_path(job_dir, settings.OUTPUT_VIOLATIONS_FILE))
+    pipe.add("export_processed", export_file, ["validated"],
+             path=job_path(job_dir, settings.OUTPUT_PROCESSED_FILE))
+    return pipe
 
 # -------------------- Streamlit UI --------------------
 st.title("📊 Excel Workflow Automation Tool")
 
 uploaded_file = st.file_uploader("📂 Upload Excel or CSV file", type=["xlsx", "csv"])
+rules_file = st.sidebar.file_uploader("📐 Validation rules (JSON/YAML)", type=["json", "yaml", "yml"])
+all_sheets = st.sidebar.checkbox("📑 Combine all workbook sheets")
+show_performance = st.sidebar.checkbox("⏱️ Show performance")
 
 if uploaded_file:
-    df = load_data(uploaded_file)
+    pipe = build_pipeline(uploaded_file, load_rules(rules_file) if rules_file else None, all_sheets, job_dir)
+    # Parsing a large workbook takes a while, so unless the load is cached
+    # the first chunk is previewed while the full load runs in the background
+    _, load = submit_job(pipe, ["load"])
+    preview = st.empty()
+    if not load.wait(0.1):
+        first = first_rows(uploaded_file)
+        if first is not None:
+            with preview.container():
+                st.write("⏳ Loading the whole file; first rows:")
+                st.dataframe(first)
+    df = run_in_background(pipe, ["load"])["load"]
+    preview.empty()
     if df is not None:
         st.success("✅ File loaded successfully!")
         st.dataframe(df.head())
@@ -128,38 +163,50 @@ if uploaded_file:
             ["Clean Data", "Validate Data", "Transform Data", "Generate Report"]
         )
 
+        # Every action writes its result once; the download serves those bytes
         if action == "Clean Data":
-            df = clean_data(df)
+            df, processed = run_in_background(pipe, ["clean", "export_cleaned"]).values()
             st.write("✅ Cleaned Data Preview")
             st.dataframe(df.head())
-            df.to_excel(OUTPUT_CLEANED_FILE, index=False)
 
         elif action == "Validate Data":
-            df = validate_with_sql(df)
+            if rules_file:
+                violations, _ = run_in_background(pipe, ["violations", "export_violations"]).values()
+                st.write(f"⚠️ {len(violations)} rows violate at least one rule")
+                st.dataframe(violations.head(100))
+            df, processed = run_in_background(pipe, ["validated", "export_validated"]).values()
             st.write("✅ Validated Data Preview")
             st.dataframe(df.head())
-            df.to_excel(OUTPUT_CLEANED_FILE, index=False)
 
         elif action == "Transform Data":
-            df = clean_data(df)  # Using clean_data as transformation
+            df, processed = run_in_background(pipe, ["clean", "export_cleaned"]).values()  # Using clean_data as transformation
             st.write("✅ Transformed Data Preview")
             st.dataframe(df.head())
-            df.to_excel(OUTPUT_CLEANED_FILE, index=False)
 
         elif action == "Generate Report":
-            generate_report(df)
-            st.success(f"📄 Report generated successfully! Check the '{OUTPUT_DIR}' folder.")
+            # The report and the export are independent and run concurrently
+            _, processed = run_in_background(pipe, ["report", "export_processed"]).values()
+            st.success(f"📄 Report generated successfully! Check the '{job_dir}' folder.")
 
         # Download processed data
-        towrite = io.BytesIO()
-        df.to_excel(towrite, index=False, engine='openpyxl')
-        towrite.seek(0)
         st.download_button(
             label="📥 Download Processed File",
-            data=towrite,
+            data=processed,
             file_name="processed_output.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
 else:
     st.info("👆 Upload an Excel file to get started.")
+
+if show_performance:
+    # Steps served from the cache do not run again, so they add no records
+    with st.expander("⏱️ Performance", expanded=True):
+        records = recent_metrics()
+        if records:
+            st.dataframe(list(reversed(records)), column_order=[
+                "step", "status", "wall_seconds", "cpu_seconds", "rows_in", "rows_out",
+                "peak_rss_mb", "peak_rss_delta_mb", "tracemalloc_peak_mb",
+            ])
+        else:
+            st.write("No steps have run yet.")
@@ -1,14 +1,42 @@
+import json
+import logging
+import os
+import numpy as np
 import pandas as pd
 import pytest
-from excel_automation import clean_data, validate_with_sql, load_data
+import excel_automation
+from excel_automation import (
+    clean_data, validate_with_sql, load_data, drop_duplicates_chunked,
+    compile_rule, rule_mask, RuleSyntaxError, Rule, load_rules, validate_rules,
+    summarize, HyperLogLog, KLLSketch, write_excel,
+)
+
+@pytest.fixture(autouse=True)
+def isolated_output(tmp_path_factory, monkeypatch):
+    """Point every output path (cache, logs, metrics, ...) at a temporary directory"""
+    settings = excel_automation.settings
+    out, default = str(tmp_path_factory.mktemp("output")), settings.OUTPUT_DIR
+    for name in dir(settings):
+        value = getattr(settings, name)
+        if name.isupper() and isinstance(value, str) and (value + os.sep).startswith(default + os.sep):
+            monkeypatch.setattr(settings, name, out + value[len(default):])
+    loggers = [logging.getLogger(), logging.getLogger("excel_automation.metrics")]
+    handlers = [list(logger.handlers) for logger in loggers]
+    yield out
+    # Drop handlers a test installed (e.g. the CLI's log and metrics files)
+    for logger, before in zip(loggers, handlers):
+        for handler in logger.handlers[:]:
+            if handler not in before:
+                logger.removeHandler(handler)
+                handler.close()
 
 # Sample test DataFrame
 @pytest.fixture
 def sample_df():
     return pd.DataFrame({
-        "Name": ["Alice", "Bob", "Alice", None],
-        "Amount": [100, -50, None, 200],
-        "Category": ["A", None, "B", "C"]
+        "Name": ["Alice", "Bob", "Alice", None, "Alice"],
+        "Amount": [100, -50, None, 200, 100],
+        "Category": ["A", None, "B", "C", "A"]
     })
 
 def test_load_data_excel(tmp_path):
@@ -43,3 +71,487 @@ def test_validate_with_sql(sample_df):
 
     # Ensure columns remain the same
     assert list(validated_df.columns) == list(cleaned_df.columns)
+
+def test_load_data_csv_chunked(tmp_path):
+    df = pd.DataFrame({"Col1": range(10), "Col2": list("ABCDEFGHIJ")})
+    temp_file = tmp_path / "test.csv"
+    df.to_csv(temp_file, index=False)
+
+    chunks = list(load_data(str(temp_file), chunksize=4))
+
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df)
+
+def test_load_data_excel_chunked(tmp_path):
+    df = pd.DataFrame({"Col1": range(10), "Col2": list("ABCDEFGHIJ")})
+    temp_file = tmp_path / "test.xlsx"
+    df.to_excel(temp_file, index=False)
+
+    chunks = list(load_data(str(temp_file), chunksize=4))
+
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df)
+
+def test_excel_chunks_match_read_excel(tmp_path):
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Name", "Amount", "Amount", "Amount.1"])
+    for row in [["a", 1, 2, 3], ["b", None, 5, 6], [None, None, None, None], ["c", 7, 8, 9]]:
+        ws.append(row)
+    for r in range(7, 14):  # styled but empty trailing rows
+        ws.cell(r, 1).number_format = "0.00"
+    temp_file = tmp_path / "test.xlsx"
+    wb.save(temp_file)
+
+    chunks = list(load_data(str(temp_file), chunksize=2))
+
+    assert [c.index.tolist() for c in chunks] == [[0, 1], [2, 3]]
+    pd.testing.assert_frame_equal(pd.concat(chunks), pd.read_excel(temp_file))
+
+def test_load_data_uses_content_hash_cache(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(excel_automation.settings, "CACHE_DIR", str(tmp_path / "cache"))
+    df = pd.DataFrame({"Col1": [1, 2], "Col2": ["A", "B"]})
+    temp_file = tmp_path / "test.xlsx"
+    df.to_excel(temp_file, index=False)
+
+    first = load_data(str(temp_file))
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+
+    second = load_data(str(temp_file))
+    pd.testing.assert_frame_equal(first, second)
+
+def test_drop_duplicates_chunked_spills_and_keeps_first():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Amount": rng.integers(0, 20, 2000),
+        "Category": rng.choice(["A", "B", None], 2000),
+    })
+    chunks = (df.iloc[i:i + 300] for i in range(0, len(df), 300))
+
+    # A tiny budget spills to disk after the first chunk
+    deduped = pd.concat(drop_duplicates_chunked(chunks, memory_bytes=64))
+
+    pd.testing.assert_frame_equal(deduped, df.drop_duplicates())
+
+@pytest.mark.parametrize("memory_bytes, spills", [(None, False), (64 * 1024, True)])
+def test_drop_duplicates_chunked_matches_drop_duplicates(memory_bytes, spills, caplog):
+    # Run time against input size is checked by benchmarks.dedupe_scaling
+    n = 50_000
+    rng = np.random.default_rng(n)
+    df = pd.DataFrame({"Amount": rng.integers(0, n, n), "Qty": rng.integers(0, 50, n)})
+
+    with caplog.at_level("INFO", logger="excel_automation.cleaning"):
+        deduped = pd.concat(drop_duplicates_chunked(
+            (df.iloc[i:i + 5000] for i in range(0, n, 5000)), memory_bytes=memory_bytes))
+
+    pd.testing.assert_frame_equal(deduped, df.drop_duplicates())
+    assert ("spilling to disk" in caplog.text) == spills
+
+def test_clean_data_chunked_matches_in_memory():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "Amount": rng.choice([10.0, 20.0, 70.0, np.nan], 500),
+        "Qty": rng.integers(0, 40, 500),
+    })
+    chunks = (df.iloc[i:i + 70] for i in range(0, len(df), 70))
+
+    streamed = pd.concat(clean_data(chunks))
+
+    # Means come from the whole deduplicated stream, not from each chunk
+    pd.testing.assert_frame_equal(streamed, clean_data(df.copy()))
+
+def test_clean_data_chunked_keeps_text_roles_across_chunks(tmp_path):
+    # The first CSV chunk has no Category values, so it is read as float
+    df = pd.DataFrame({
+        "Amount": [1, 2, 3, 1, 2, 3],
+        "Category": [None, None, None, "A", None, "B"],
+    })
+    path = tmp_path / "sparse.csv"
+    df.to_csv(path, index=False)
+
+    streamed = pd.concat(clean_data(load_data(str(path), chunksize=3)))
+    expected = clean_data(pd.read_csv(path))
+
+    assert streamed["Category"].tolist() == expected["Category"].tolist()
+    assert streamed.index.equals(expected.index)
+
+@pytest.mark.parametrize("rule", [
+    "Amount >= 0",
+    "Amount <> 100 OR Category = 'A'",
+    "Category IN ('A', 'B') AND NOT Amount BETWEEN 0 AND 150",
+    "Name IS NULL OR Category IS NOT NULL",
+    "Category NOT IN ('C', NULL)",
+    "amount >= 0 AND category <> 'B'",
+])
+def test_compiled_rules_match_sqlite(sample_df, rule):
+    vectorized = compile_rule(rule)(sample_df)
+    sqlite_mask = excel_automation.validation._sqlite_mask(sample_df, rule)
+
+    assert vectorized.tolist() == sqlite_mask.tolist()
+
+def test_unsupported_rule_falls_back_to_sqlite(sample_df):
+    with pytest.raises(RuleSyntaxError):
+        compile_rule("abs(Amount) > 60")
+
+    assert rule_mask(sample_df, "abs(Amount) > 60").tolist() == [True, False, False, True, True]
+
+@pytest.mark.parametrize("rule", [
+    "Amount = '100'", "Amount IN ('100', '200')", "Code = 1", "Code IN (1, 2)", "missing > 0",
+])
+def test_rules_needing_sqlite_semantics_fall_back(sample_df, rule):
+    # sqlite's type affinity and unknown columns are left to sqlite itself
+    df = sample_df.assign(Code=["1", "2", "x", None, "1"])
+    with pytest.raises(RuleSyntaxError):
+        compile_rule(rule)(df)
+
+    if rule != "missing > 0":
+        assert rule_mask(df, rule).tolist() == excel_automation.validation._sqlite_mask(df, rule).tolist()
+
+def test_literals_of_the_other_type_match_sqlite(sample_df):
+    assert rule_mask(sample_df, "Amount = '100'").tolist() == [True, False, False, False, True]
+    assert rule_mask(sample_df.assign(Code=["1", "2", "x", None, "1"]), "Code = 1").tolist() == [
+        True, False, False, False, True]
+
+def test_validate_rules_reports_violations(sample_df, tmp_path):
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(json.dumps({"rules": [
+        {"name": "non_negative", "predicate": "Amount >= 0"},
+        {"name": "has_category", "predicate": "Category IS NOT NULL", "severity": "warning"},
+    ]}))
+    rules = load_rules(str(rules_file))
+    assert rules[1] == Rule("has_category", "Category IS NOT NULL", "warning")
+
+    valid_df, violations = validate_rules(sample_df, rules)
+
+    # Row 1 fails both rules, row 2 has a NULL Amount, which is not >= 0
+    assert violations["row"].tolist() == [1, 2]
+    assert violations["failed_rules"].tolist() == ["non_negative, has_category", "non_negative"]
+    assert violations["bitmask"].tolist() == [3, 1]
+    assert valid_df["Amount"].tolist() == [100, 200, 100]
+
+def test_summarize_matches_describe_on_small_frames(sample_df):
+    expected = sample_df.describe(include="all")
+
+    summary = summarize(sample_df)
+
+    assert list(summary.index) == list(expected.index)
+    assert summary.loc["top", "Name"] == "Alice"
+    assert summary.loc["unique", "Category"] == 3
+    for stat in ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]:
+        assert summary.loc[stat, "Amount"] == pytest.approx(expected.loc[stat, "Amount"])
+
+def test_summary_sketches_are_mergeable_and_accurate():
+    rng = np.random.default_rng(0)
+    values = rng.permutation(200_000)
+    hll, kll = HyperLogLog(), KLLSketch()
+    for chunk in np.array_split(values, 20):
+        part_hll, part_kll = HyperLogLog(), KLLSketch()
+        part_hll.update(chunk)
+        part_kll.update(chunk)
+        hll.merge(part_hll)
+        kll.merge(part_kll)
+
+    assert hll.count() == pytest.approx(200_000, rel=0.03)
+    assert kll.quantiles([0.5])[0] == pytest.approx(100_000, rel=0.03)
+
+def test_write_excel_streams_chunks_across_sheets(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_automation.settings, "EXCEL_MAX_ROWS", 5)
+    df = pd.DataFrame({
+        "Amount": [1.5, None, 3.0, 4.0, 5.0, 6.0],
+        "Date": pd.to_datetime(["2024-01-01", None, "2024-01-03", "2024-01-04", "2024-01-05", "2024-01-06"]),
+        "Name": ["a", "b", None, "d", "e", "f"],
+    })
+    path = tmp_path / "out.xlsx"
+
+    rows = write_excel((df.iloc[i:i + 4] for i in range(0, len(df), 4)), str(path))
+
+    assert rows == 6
+    sheets = pd.read_excel(path, sheet_name=None)
+    assert [len(s) for s in sheets.values()] == [4, 2]
+    pd.testing.assert_frame_equal(pd.concat(sheets.values(), ignore_index=True), df, check_dtype=False)
+
+def test_cli_run_headless(tmp_path, capsys):
+    from excel_automation.cli import main
+
+    df = pd.DataFrame({"Name": ["a", "b", "a"], "Amount": [10, -5, 10]})
+    src, out = tmp_path / "in.csv", tmp_path / "out.csv"
+    df.to_csv(src, index=False)
+
+    assert main(["run", "--input", str(src), "--output", str(out), "--steps", "clean,validate"]) == 0
+
+    assert pd.read_csv(out)["Amount"].tolist() == [10]
+    assert "1 rows" in capsys.readouterr().out
+
+@pytest.mark.parametrize("chunksize", [None, 2])
+def test_cli_run_writes_rule_violations(tmp_path, capsys, chunksize):
+    from excel_automation.cli import main
+
+    src, out, rules = tmp_path / "in.csv", tmp_path / "out.csv", tmp_path / "rules.json"
+    pd.DataFrame({"Amount": [10, -5, 20, -7, 30]}).to_csv(src, index=False)
+    rules.write_text(json.dumps([{"name": "non_negative", "predicate": "Amount >= 0"}]))
+    args = ["--chunksize", str(chunksize)] if chunksize else []
+
+    assert main(["run", "--input", str(src), "--output", str(out), "--steps", "validate",
+                 "--rules", str(rules), *args]) == 0
+
+    assert pd.read_csv(out)["Amount"].tolist() == [10, 20, 30]
+    violations = pd.read_excel(tmp_path / "violations.xlsx")
+    assert violations["row"].tolist() == [1, 3]
+    assert violations["failed_rules"].tolist() == ["non_negative"] * 2
+    assert "violations ->" in capsys.readouterr().out
+
+@pytest.mark.parametrize("data, steps, output", [
+    ({"Amount": ["x", "y"]}, "report", "out.csv"),  # the histogram cannot bin text
+    ({"Name": ["a", "b"]}, "validate", "out.csv"),  # the default rule needs Amount
+    ({"Amount": [1, 2]}, "clean", "taken"),  # a directory is in the way
+])
+def test_cli_run_fails_when_a_step_fails(tmp_path, capsys, data, steps, output):
+    from excel_automation.cli import main
+
+    src = tmp_path / "in.csv"
+    pd.DataFrame(data).to_csv(src, index=False)
+    (tmp_path / "taken").mkdir()
+
+    assert main(["run", "--input", str(src), "--output", str(tmp_path / output), "--steps", steps]) == 1
+    assert "error:" in capsys.readouterr().err
+
+def test_run_batch_processes_directory_in_parallel(tmp_path):
+    from excel_automation import run_batch
+
+    inputs = tmp_path / "in"
+    inputs.mkdir()
+    for i in range(3):
+        pd.DataFrame({"Amount": [i, -1, i]}).to_csv(inputs / f"region{i}.csv", index=False)
+    pd.DataFrame({"Amount": [5, 6]}).to_excel(inputs / "region2.xlsx", index=False)
+    pd.DataFrame({"Name": ["a"]}).to_csv(inputs / "no_amount.csv", index=False)
+    (inputs / "broken.xlsx").write_text("not a workbook")
+
+    summary = run_batch(str(inputs), ["clean", "validate"], output_dir=str(tmp_path / "out"), workers=2)
+
+    assert summary["files"] == 6
+    assert summary["failed"] == 2
+    statuses = {os.path.basename(r["input"]): r["status"] for r in summary["results"]}
+    assert statuses["broken.xlsx"] == "failed"
+    assert statuses["no_amount.csv"] == "failed"  # the default rule needs Amount
+    # Same stem, different extension: each keeps its own output
+    assert pd.read_excel(tmp_path / "out" / "region2.csv" / "cleaned_data.xlsx")["Amount"].tolist() == [2]
+    assert pd.read_excel(tmp_path / "out" / "region2.xlsx" / "cleaned_data.xlsx")["Amount"].tolist() == [5, 6]
+
+def test_load_data_all_sheets(tmp_path):
+    temp_file = tmp_path / "multi.xlsx"
+    with pd.ExcelWriter(temp_file) as writer:
+        for region in ["North", "South", "East"]:
+            pd.DataFrame({"Amount": [1, 2]}).to_excel(writer, sheet_name=region, index=False)
+
+    sheets = load_data(str(temp_file), sheet_name=None)
+    combined = load_data(str(temp_file), sheet_name=None, concat_sheets=True)
+
+    assert list(sheets) == ["North", "South", "East"]
+    assert combined["sheet"].tolist() == ["North", "North", "South", "South", "East", "East"]
+
+def test_resolve_excel_engine_falls_back_to_openpyxl(monkeypatch):
+    from excel_automation import resolve_excel_engine
+
+    monkeypatch.setattr(excel_automation.settings, "EXCEL_ENGINE_PREFERENCE",
+                        [("calamine", "no_such_calamine_module"), ("openpyxl", "openpyxl")])
+
+    assert resolve_excel_engine("auto") == "openpyxl"
+    assert resolve_excel_engine("calamine") == "calamine"
+
+def test_optimized_dtypes_flow_through_clean_and_validate(sample_df):
+    from excel_automation import optimize_dtypes
+
+    df = optimize_dtypes(pd.concat([sample_df] * 50, ignore_index=True))
+
+    assert df["Name"].dtype == "category"
+    assert df["Amount"].dtype == np.float32
+
+    cleaned = clean_data(df)
+    assert cleaned["Amount"].isnull().sum() == 0
+    assert "Unknown" in cleaned["Name"].values
+    assert cleaned["Category"].isnull().sum() == 0
+
+    validated = validate_with_sql(cleaned, "Amount >= 0 AND Category < 'C'")
+    assert (validated["Amount"] >= 0).all()
+    assert set(validated["Category"]) <= {"A", "B"}
+
+@pytest.mark.parametrize("suffix, chunksize", [(".csv", None), (".csv", 3), (".xlsx", None), (".xlsx", 3)])
+def test_load_data_pushes_down_columns_and_filters(tmp_path, suffix, chunksize):
+    df = pd.DataFrame({
+        "Region": ["North", "South", "North", "East", "North", "South", "North"],
+        "Amount": [10, 20, 30, 40, 50, 60, 70],
+        "Notes": list("abcdefg"),
+    })
+    temp_file = tmp_path / f"data{suffix}"
+    if suffix == ".csv":
+        df.to_csv(temp_file, index=False)
+    else:
+        df.to_excel(temp_file, index=False)
+
+    # Filter identifiers match case-insensitively, as in rule_mask
+    for filters in (["Region = 'North'", "Amount > 10"], ["region = 'North'", "amount > 10"]):
+        loaded = load_data(str(temp_file), chunksize=chunksize, columns=["Amount"], filters=filters,
+                           errors="raise")
+        if chunksize:
+            loaded = pd.concat(loaded, ignore_index=True)
+
+        assert list(loaded.columns) == ["Amount"]
+        assert loaded["Amount"].tolist() == [30, 50, 70]
+
+    if chunksize is None:  # projected from the parsed-file cache too
+        load_data(str(temp_file))
+        cached = load_data(str(temp_file), columns=["Amount"], filters="region = 'North'", errors="raise")
+        assert cached["Amount"].tolist() == [10, 30, 50, 70]
+
+def test_atomic_write_and_job_janitor(tmp_path):
+    target = tmp_path / "out.xlsx"
+    with pytest.raises(RuntimeError):
+        with excel_automation.atomic_write(str(target)) as tmp:
+            open(tmp, "w").write("partial")
+            raise RuntimeError("writer crashed")
+    assert os.listdir(tmp_path) == []
+
+    jobs = tmp_path / "jobs"
+    stale, fresh = excel_automation.create_job_dir(str(jobs)), excel_automation.create_job_dir(str(jobs))
+    assert excel_automation.export_data(pd.DataFrame({"A": [1]}), excel_automation.job_path(stale, "x.csv")) == 1
+    os.utime(stale, (0, 0))
+    assert excel_automation.cleanup_jobs(str(jobs), ttl_seconds=3600) == 1
+    assert os.listdir(jobs) == [os.path.basename(fresh)]
+
+def test_pipeline_reuses_cached_intermediates(sample_df):
+    calls = []
+    def clean(df):
+        calls.append("clean")
+        return clean_data(df)
+    cache = excel_automation.StepCache(max_entries=8)
+    def build():
+        pipe = excel_automation.Pipeline("sample", cache=cache)
+        pipe.add("load", lambda: sample_df)
+        pipe.add("clean", clean, ["load"])
+        pipe.add("validate", validate_with_sql, ["clean"])
+        pipe.add("rows", len, ["validate"])
+        pipe.add("chunks", lambda df: iter([df, df]), ["clean"])
+        pipe.add("left", lambda chunks: sum(map(len, chunks)), ["chunks"])
+        pipe.add("right", lambda chunks: sum(map(len, chunks)), ["chunks"])
+        return pipe
+
+    first = build().run(["clean", "rows", "left", "right"])
+    second = build().run(["rows"])
+    assert calls == ["clean"]
+    assert first["rows"] == second["rows"] == 3
+    assert first["left"] == first["right"] == 2 * len(first["clean"])  # chunk stream spooled for both
+
+def test_pipeline_caches_only_steps_that_did_not_raise(tmp_path):
+    cache = excel_automation.StepCache(max_entries=8)
+    missing = str(tmp_path / "missing.csv")
+    reports = []
+    def build():
+        pipe = excel_automation.Pipeline("missing", cache=cache)
+        pipe.add("load", load_data, args=(missing,), errors="raise")
+        pipe.add("report", lambda df: reports.append(len(df)), ["load"])  # returns None, like generate_report
+        return pipe
+
+    with pytest.raises(FileNotFoundError):
+        build().run()
+    assert len(cache) == 0
+
+    pd.DataFrame({"Amount": [1]}).to_csv(missing, index=False)
+    build().run()
+    build().run()
+    assert reports == [1]
+
+def test_job_runner_reports_pipeline_progress(sample_df):
+    pipe = excel_automation.Pipeline("sample")
+    pipe.add("load", lambda: sample_df)
+    pipe.add("clean", clean_data, ["load"])
+    runner = excel_automation.JobRunner(workers=1)
+    try:
+        job = runner.submit(pipe.run, ["clean"], key="clean")
+        assert job.wait(30)
+        assert job.status == "done" and job.progress == 1.0
+        assert len(job.result()["clean"]) == 4
+
+        failed = runner.submit(lambda progress: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            failed.result(30)
+        assert failed.status == "failed"
+    finally:
+        runner.shutdown()
+
+def test_steps_emit_metrics_records(sample_df, caplog):
+    with caplog.at_level("INFO", logger="excel_automation.metrics"):
+        clean_data(sample_df)
+        chunks = clean_data(iter([sample_df.iloc[:3], sample_df.iloc[3:]]))
+        assert excel_automation.recent_metrics()[-1]["rows_in"] == 5  # chunked record not emitted yet
+        rows = sum(len(chunk) for chunk in chunks)
+
+        # One record per call, however many chunks a stream has
+        rules = [Rule("non_negative", "Amount >= 0")]
+        validated = validate_with_sql(iter([sample_df.iloc[:2], sample_df.iloc[2:4], sample_df.iloc[4:]]), rules)
+        assert sum(len(chunk) for chunk in validated) == 3
+
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "excel_automation.metrics"]
+    assert [(r["step"], r["rows_in"], r["rows_out"]) for r in records] == [
+        ("clean", 5, 4), ("clean", None, rows), ("validate", None, 3)]
+    assert all(r["wall_seconds"] > 0 and r["cpu_seconds"] >= 0 and r["peak_rss_mb"] > 0 for r in records)
+
+def test_metrics_peak_rss_catches_memory_freed_within_the_step(tmp_path, monkeypatch):
+    import time
+    import tracemalloc
+    from excel_automation.cli import main
+    from excel_automation.metrics import instrument
+
+    @instrument("spike")
+    def spike():
+        block = np.ones(2**25)  # 256 MB, freed before the step returns
+        time.sleep(0.2)
+        del block
+
+    spike()
+    assert excel_automation.recent_metrics()[-1]["peak_rss_delta_mb"] > 200
+
+    src = tmp_path / "in.csv"
+    pd.DataFrame({"Amount": [1, 2]}).to_csv(src, index=False)
+    monkeypatch.setattr(excel_automation.settings, "TRACE_MEMORY", False)
+    try:
+        assert main(["run", "--input", str(src), "--output", str(tmp_path / "out.csv"),
+                     "--steps", "clean", "--trace-memory"]) == 0
+    finally:
+        tracemalloc.stop()
+    assert excel_automation.recent_metrics()[-1]["tracemalloc_peak_mb"] is not None
+
+def test_engine_import_defers_heavy_dependencies():
+    import subprocess
+    import sys
+    lazy = ("matplotlib", "sqlite3", "streamlit", "openpyxl", "xlsxwriter")
+    code = f"import sys, excel_automation; print([m for m in {lazy!r} if m in sys.modules])"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root)
+    assert out.stdout.strip() == "[]"
+
+def test_report_chart_is_cached_by_data_and_spec(sample_df, tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_automation.settings, "CHART_CACHE_DIR", str(tmp_path / "charts"))
+    excel_automation.generate_report(sample_df, str(tmp_path / "first"))
+    png = (tmp_path / "first" / "amount_distribution.png").read_bytes()
+    assert png.startswith(b"\x89PNG")
+
+    def fail(*args):
+        raise AssertionError("chart re-rendered for unchanged data")
+    monkeypatch.setattr(excel_automation.charts, "_render_histogram", fail)
+    excel_automation.generate_report(iter([sample_df.iloc[:2], sample_df.iloc[2:]]), str(tmp_path / "second"))
+    assert (tmp_path / "second" / "amount_distribution.png").read_bytes() == png
+
+def test_histogram_merges_chunks_over_fixed_edges():
+    values = np.random.default_rng(0).normal(100, 30, 10_000)
+    values[::50] = np.nan
+    hist = excel_automation.Histogram.from_range(np.nanmin(values), np.nanmax(values), bins=20)
+    other = excel_automation.Histogram(hist.edges)
+    hist.update(values[:3_000])
+    other.update(values[3_000:])
+    hist.merge(other)
+
+    counts, edges = np.histogram(values[~np.isnan(values)], bins=20)
+    np.testing.assert_array_equal(hist.edges, edges)
+    np.testing.assert_array_equal(hist.counts, counts)